@@ -0,0 +1,299 @@
+import argparse
+import ast
+import contextlib
+import csv
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from csv_fetch_cache import cached_csv_path
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is reported as None
+    resource = None
+
+# End-to-end benchmark for csv_to_markdown.py, csv_to_markdown_dev.py and the
+# notebook. Synthetic sheets shaped like sheets.json (every tab, wide Keywords,
+# History with repeated years, Transcript prose, apostrophe-heavy names) are
+# written straight into a CSV cache, and each pipeline runs offline from it
+# into a throwaway vault. Every pipeline/scale pair runs in its own process so
+# timings and peak memory are not shared.
+# Run with: python benchmark_pipelines.py [--scales 1,10,100] [--pipelines simple,dev,notebook]
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINES = ('simple', 'dev', 'notebook')
+
+# Rows per sheet at 1x scale
+BASE_ROWS = 40
+
+WORDS = [
+    "Moth", "Lantern", "Forge", "Edge", "Winter", "Heart", "Grail", "Knock", "Secret Histories", "Rose",
+    "Scale", "Nectar", "Sky", "Bell", "Candle", "Hush", "Wolf's Tooth", "Sisters'", "Thread", "Glass",
+    "Ash", "Bone", "Salt", "Iron: Cold", "Hunter's Moon", "Twins'", "Key|Door", "Bishop's Mitre",
+]
+
+KEYWORD_COLUMNS = [
+    "Aspects", "Principles", "Lessons", "Memories", "Skills", "Languages", "Evolutions",
+    "Tallies", "Roles", "Wounds", "Omens", "Seasons",
+]
+
+def export_url(link_template, gid):
+    return link_template.replace("edit?gid=gid_value#gid=gid_value", f"export?format=csv&gid={gid}")
+
+def load_sheets_config():
+    with open(os.path.join(REPO_DIR, 'sheets.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def build_name_pool(sheets_config, rng, per_sheet=12):
+    """Entity names shared across sheets, so cells link to notes in other tabs"""
+    names = []
+    for spreadsheet in sheets_config.values():
+        for sheet_name in spreadsheet['sheets']:
+            prefix = sheet_name.split()[0]
+            for i in range(per_sheet):
+                word = rng.choice(WORDS)
+                names.append(f"{word} {prefix} {i}" if rng.random() < 0.7 else word)
+    return names
+
+def generate_sheet_rows(sheet_name, row_count, names, rng):
+    """Header plus row_count rows for one tab, shaped by the kind of sheet it is"""
+    if sheet_name == "Keywords":
+        rows = [KEYWORD_COLUMNS]
+        for _ in range(row_count):
+            rows.append([rng.choice(WORDS + names) if rng.random() < 0.7 else "" for _ in KEYWORD_COLUMNS])
+        return rows
+
+    if sheet_name == "History":
+        rows = [["Year", "Event", "Person", "Description"]]
+        years = max(2, row_count // 8)
+        for _ in range(row_count):
+            rows.append([
+                str(1900 + rng.randrange(years)), rng.choice(names), rng.choice(WORDS),
+                f"The {rng.choice(WORDS)} was seen near {rng.choice(names)}",
+            ])
+        return rows
+
+    if "Conversation" in sheet_name:
+        rows = [["Conversation", "Speaker", "Transcript", "Note"]]
+        for i in range(row_count):
+            transcript = " ".join(rng.choice(WORDS + names) for _ in range(rng.randint(30, 60)))
+            rows.append([f"{rng.choice(names)} Talk {i}", rng.choice(names), transcript, rng.choice(WORDS)])
+        return rows
+
+    rows = [[sheet_name.split()[0], "Description", "Aspect", "Note", "Description", "Related"]]
+    for i in range(row_count):
+        title = f"{rng.choice(names)} {i}" if rng.random() < 0.5 else rng.choice(names)
+        rows.append([
+            title,
+            f"Multi\nline: {rng.choice(WORDS)} {{x}} #{i}",
+            rng.choice(WORDS),
+            rng.choice(names),
+            "" if rng.random() < 0.5 else rng.choice(WORDS),
+            rng.choice(names),
+        ])
+    # Alias row named like the sheet, as the notebook expects
+    rows.append([sheet_name, sheet_name.lower(), sheet_name.split()[0]])
+    return rows
+
+def write_synthetic_cache(cache_dir, scale, seed=0):
+    """Fill cache_dir with one synthetic CSV per tab in sheets.json, as if downloaded"""
+    rng = random.Random(seed)
+    sheets_config = load_sheets_config()
+    names = build_name_pool(sheets_config, rng)
+    total_rows = 0
+    for spreadsheet in sheets_config.values():
+        for sheet_name, gid in spreadsheet['sheets'].items():
+            rows = generate_sheet_rows(sheet_name, BASE_ROWS * scale, names, rng)
+            path = cached_csv_path(export_url(spreadsheet['link_template'], gid), cache_dir)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                csv.writer(f).writerows(rows)
+            total_rows += len(rows) - 1
+    return total_rows
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+@contextlib.contextmanager
+def measure(stages, stage):
+    """
+    Add a stage's wall time to stages, and how far it raised the process's
+    peak RSS. ru_maxrss only ever grows, so a stage that stays below an
+    earlier stage's peak adds 0 rather than reporting that peak again.
+    """
+    start_time = time.perf_counter()
+    start_peak = peak_rss_mb()
+    try:
+        yield
+    finally:
+        entry = stages.setdefault(stage, {'seconds': 0.0, 'rss_growth_mb': None})
+        entry['seconds'] = round(entry['seconds'] + time.perf_counter() - start_time, 4)
+        if start_peak is not None:
+            entry['rss_growth_mb'] = round((entry['rss_growth_mb'] or 0.0) + peak_rss_mb() - start_peak, 1)
+
+def time_functions(module, stage_functions, stages):
+    """Wrap module-level functions so every call adds to its stage in stages"""
+    for stage, function_name in stage_functions.items():
+        function = getattr(module, function_name)
+
+        def timed(*args, _function=function, _stage=stage, **kwargs):
+            with measure(stages, _stage):
+                return _function(*args, **kwargs)
+
+        setattr(module, function_name, timed)
+
+def run_simple(cache_dir, vault_dir):
+    import csv_to_markdown as pipeline
+    pipeline.csv_cache_dir = cache_dir
+    pipeline.offline_mode = True
+    stages = {}
+    time_functions(pipeline, {
+        'download': 'download_csv',
+        'link references': 'create_link_references',
+        'render': 'process_csv',
+        'reverse links': 'update_reverse_links',
+        'link reference file': 'write_link_references',
+        'write': 'write_vault',
+    }, stages)
+    pipeline.main()
+    return stages
+
+def run_dev(cache_dir, vault_dir):
+    import csv_to_markdown_dev as pipeline
+    pipeline.csv_cache_dir = cache_dir
+    pipeline.offline_mode = True
+    pipeline.incremental_build = False
+    pipeline.main()
+    # The dev pipeline times its own stages and their memory growth in its run report
+    return {
+        stage: {'seconds': round(seconds, 4), 'rss_growth_mb': pipeline.run_report['stage_rss_mb'].get(stage)}
+        for stage, seconds in pipeline.run_report['stages'].items()
+    }
+
+def load_notebook_functions(notebook_path):
+    """Execute the notebook's import and function-definition cells, skipping the driver cells"""
+    with open(notebook_path, 'r', encoding='utf-8') as f:
+        notebook = json.load(f)
+    namespace = {'__name__': 'notebook'}
+    for cell in notebook['cells']:
+        if cell['cell_type'] != 'code':
+            continue
+        source = ''.join(cell['source'])
+        tree = ast.parse(source)
+        if all(isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef)) for node in tree.body):
+            exec(compile(tree, notebook_path, 'exec'), namespace)
+    return namespace
+
+def run_notebook(cache_dir, vault_dir):
+    notebook = load_notebook_functions(os.path.join(REPO_DIR, 'google_sheet_to_obsidian.ipynb'))
+    with open(os.path.join(REPO_DIR, 'config.json'), 'r', encoding='utf-8') as f:
+        config_dict = json.load(f)
+    stages = {}
+    with measure(stages, 'urls'):
+        master_url_dict = notebook['construct_master_url_dict'](load_sheets_config())
+    with measure(stages, 'download and parse'):
+        unified_dict = notebook['construct_unified_dict'](config_dict, master_url_dict, cache_dir=cache_dir, offline=True)
+    with measure(stages, 'cross references'):
+        notebook['process_all_game_sheets'](unified_dict)
+    with measure(stages, 'render and write'):
+        notebook['dict_to_markdown'](unified_dict, vault_dir)
+    return stages
+
+RUNNERS = {'simple': run_simple, 'dev': run_dev, 'notebook': run_notebook}
+
+def run_child(pipeline, cache_dir, vault_dir, result_path):
+    """Run one pipeline in this process and write its timings to result_path"""
+    sys.path.insert(0, REPO_DIR)
+    start_time = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        stages = RUNNERS[pipeline](cache_dir, vault_dir)
+        # Drain the log queue while stdout still points at devnull
+        import pipeline_log
+        pipeline_log.stop_logging()
+    seconds = time.perf_counter() - start_time
+    files = sum(len([f for f in filenames if f.endswith('.md')]) for _, _, filenames in os.walk(vault_dir))
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump({'seconds': round(seconds, 4), 'peak_rss_mb': peak_rss_mb(), 'notes': files, 'stages': stages}, f)
+
+def run_benchmark(scales, pipelines, work_dir, timeout):
+    results = []
+    for scale in scales:
+        scale_dir = os.path.join(work_dir, f"scale_{scale}")
+        cache_dir = os.path.join(scale_dir, 'csv_cache')
+        rows = write_synthetic_cache(cache_dir, scale)
+        print(f"\n{scale}x: {rows} synthetic rows")
+
+        for pipeline in pipelines:
+            vault_dir = os.path.join(scale_dir, f"vault_{pipeline}")
+            os.makedirs(vault_dir, exist_ok=True)
+            result_path = os.path.join(scale_dir, f"{pipeline}.json")
+            env = dict(os.environ, OBSIDIAN_VAULT_PATH=vault_dir)
+            try:
+                completed = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--child', pipeline, cache_dir, vault_dir, result_path],
+                    env=env, cwd=REPO_DIR, stdout=subprocess.DEVNULL, timeout=timeout,
+                )
+            except subprocess.TimeoutExpired:
+                # Usually a quadratic stage; the smaller scales show which one
+                print(f"  {pipeline:<9} timed out after {timeout}s")
+                results.append({'scale': scale, 'pipeline': pipeline, 'rows': rows, 'error': 'timeout'})
+                continue
+            if completed.returncode != 0:
+                print(f"  {pipeline:<9} failed (exit code {completed.returncode})")
+                results.append({'scale': scale, 'pipeline': pipeline, 'rows': rows, 'error': completed.returncode})
+                continue
+
+            with open(result_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            result.update({'scale': scale, 'pipeline': pipeline, 'rows': rows})
+            results.append(result)
+            print(f"  {pipeline:<9}{result['seconds']:>9.2f}s  peak {result['peak_rss_mb']} MB  {result['notes']} notes")
+            for stage, stats in result['stages'].items():
+                growth = stats.get('rss_growth_mb')
+                print(f"    {stage:<26}{stats['seconds']:>9.3f}s" + (f"  +{growth} MB" if growth is not None else ""))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vault pipelines on synthetic sheets, offline")
+    parser.add_argument('--scales', default='1,10,100', help="Comma-separated row multipliers (default: 1,10,100)")
+    parser.add_argument('--pipelines', default=','.join(PIPELINES), help="Comma-separated subset of: " + ', '.join(PIPELINES))
+    parser.add_argument('--output', default='benchmark_results.json', help="Where to write the JSON results")
+    parser.add_argument('--timeout', type=int, default=1800, help="Seconds before a single run is abandoned (default: 1800)")
+    parser.add_argument('--keep', action='store_true', help="Keep the generated sheets and vaults")
+    parser.add_argument('--child', nargs=4, metavar=('PIPELINE', 'CACHE', 'VAULT', 'RESULT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    scales = [int(scale) for scale in args.scales.split(',')]
+    pipelines = [pipeline for pipeline in args.pipelines.split(',') if pipeline]
+    unknown = set(pipelines) - set(PIPELINES)
+    if unknown:
+        parser.error(f"unknown pipelines: {', '.join(sorted(unknown))}")
+
+    work_dir = tempfile.mkdtemp(prefix='obsidian_benchmark_')
+    try:
+        results = run_benchmark(scales, pipelines, work_dir, args.timeout)
+    finally:
+        if args.keep:
+            print(f"\nGenerated sheets and vaults kept in: {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to: {args.output}")
+
+if __name__ == "__main__":
+    main()
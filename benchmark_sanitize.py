@@ -0,0 +1,118 @@
+import random
+import re
+import string
+import timeit
+
+import markdown_sanitize
+
+# Micro-benchmark for markdown_sanitize: checks every fused helper returns
+# exactly what the original per-call helpers returned, then times both.
+# Run with: python benchmark_sanitize.py
+
+def legacy_escape_markdown(text):
+    chars_to_escape = {'\\', '#', '^', '|', '{', '}'}
+    escaped_text = []
+    for char in text:
+        if char in chars_to_escape:
+            escaped_text.append('\\' + char)
+        else:
+            escaped_text.append(char)
+    return ''.join(escaped_text)
+
+def legacy_sanitize_value(value):
+    value = value.strip()
+    value = legacy_escape_markdown(value)
+    return value
+
+def legacy_sanitize_filename(filename):
+    filename = filename.replace(':', '_')
+    filename = re.sub(r'[\\/*?:"<>|]', '_', filename)
+    return filename
+
+def legacy_sanitize_cell_value(value):
+    if not value:
+        return ""
+    value = ' '.join(value.splitlines())
+    if ':' in value:
+        value = value.replace(': ', '：')
+    return value.strip()
+
+def legacy_clean_square_brackets(text):
+    return re.sub(r'(?<!\\)\[([^\]]+)\]', r'\\[\1\\]', text)
+
+def legacy_clean_sprite_tags(text):
+    text = re.sub(r'<sprite name=[^>]+>', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+def legacy_clean_sprite_tags_and_brackets(text):
+    text = legacy_clean_sprite_tags(text)
+    return legacy_clean_square_brackets(text)
+
+def legacy_remove_empty_lines(s):
+    s = s.replace("/n", "")
+    lines = s.splitlines()
+    lines = [line.lstrip() for line in lines if line.strip()]
+    return "\n".join(lines)
+
+def legacy_clean_filename(filename):
+    invalid = r'[<>:"/\\|?*]'
+    filename = re.sub(r'^\s*(?:' + invalid + r'\s*)+', '', filename)
+    filename = re.sub(r'(?:\s*' + invalid + r')+\s*$', '', filename)
+    filename = re.sub(r'\s*(' + invalid + r')\s*', '_', filename)
+    return legacy_remove_empty_lines(filename)
+
+HELPERS = [
+    ('escape_markdown', legacy_escape_markdown),
+    ('sanitize_value', legacy_sanitize_value),
+    ('sanitize_filename', legacy_sanitize_filename),
+    ('sanitize_cell_value', legacy_sanitize_cell_value),
+    ('clean_square_brackets', legacy_clean_square_brackets),
+    ('clean_sprite_tags', legacy_clean_sprite_tags),
+    ('clean_sprite_tags_and_brackets', legacy_clean_sprite_tags_and_brackets),
+    ('remove_empty_lines', legacy_remove_empty_lines),
+    ('clean_filename', legacy_clean_filename),
+]
+
+FRAGMENTS = [
+    "Lantern", "Moth's Hour", "Edge: the blade", "<sprite name=heart>", "[Forge]", "\\[escaped]",
+    "#tag", "a|b", "{braces}", "^caret", "path/to\\file", "what?", "\"quoted\"", "<angle>", "*star*",
+    "\n", "\r\n", "  ", "\t", "/n", "Ünïcødé", "：", "\u2028", "",
+]
+
+def generate_samples(count, seed=0):
+    """Random cell-like strings mixing markup, sprites, brackets and line breaks"""
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(count):
+        parts = [rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 8))]
+        parts.append(''.join(rng.choice(string.printable) for _ in range(rng.randint(0, 12))))
+        rng.shuffle(parts)
+        samples.append(' '.join(parts) if rng.random() < 0.5 else ''.join(parts))
+    # Cells repeat heavily in real sheets (headers, aspects, filenames)
+    return samples + [rng.choice(samples) for _ in range(count)]
+
+def check_identical(samples):
+    for name, legacy in HELPERS:
+        fused = getattr(markdown_sanitize, name)
+        for sample in samples:
+            expected = legacy(sample)
+            actual = fused(sample)
+            if actual != expected:
+                raise AssertionError(f"{name}({sample!r}): expected {expected!r}, got {actual!r}")
+    print(f"All {len(HELPERS)} helpers byte-identical on {len(samples)} samples")
+
+def time_helpers(samples, repeat=5):
+    print(f"{'helper':<32}{'legacy':>10}{'fused':>10}{'speedup':>10}")
+    for name, legacy in HELPERS:
+        fused = getattr(markdown_sanitize, name)
+        if hasattr(fused, 'cache_clear'):
+            fused.cache_clear()
+        legacy_time = min(timeit.repeat(lambda: [legacy(s) for s in samples], number=1, repeat=repeat))
+        fused_time = min(timeit.repeat(lambda: [fused(s) for s in samples], number=1, repeat=repeat))
+        print(f"{name:<32}{legacy_time * 1000:>8.1f}ms{fused_time * 1000:>8.1f}ms{legacy_time / fused_time:>9.1f}x")
+
+if __name__ == "__main__":
+    samples = generate_samples(20000)
+    check_identical(samples)
+    time_helpers(samples)
@@ -0,0 +1,218 @@
+import codecs
+import json
+import logging
+import os
+import re
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Shared session so repeated downloads reuse pooled connections
+session = requests.Session()
+session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# Responses worth retrying with exponential backoff
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Cache keys already fetched or revalidated by this process
+validated_keys = set()
+
+logger = logging.getLogger(__name__)
+
+def cache_key(url):
+    """
+    Build a cache key from the spreadsheet id and gid of a Google Sheets URL.
+
+    Args:
+        url (str): Sheet edit URL or CSV export URL
+
+    Returns:
+        str: Key of the form '<spreadsheet id>_<gid>'
+    """
+    spreadsheet_match = re.search(r"/spreadsheets/d/([\w-]+)", url)
+    gid_match = re.search(r"gid=(\d+)", url)
+    spreadsheet_id = spreadsheet_match.group(1) if spreadsheet_match else "unknown"
+    gid = gid_match.group(1) if gid_match else "0"
+    return f"{spreadsheet_id}_{gid}"
+
+def cache_paths(cache_dir, key):
+    return os.path.join(cache_dir, f"{key}.csv"), os.path.join(cache_dir, f"{key}.json")
+
+def read_cached_body(body_path):
+    with open(body_path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+def cached_csv_path(url, cache_dir):
+    """Path of the cached CSV body for a URL, whether or not it has been fetched yet"""
+    return cache_paths(cache_dir, cache_key(url))[0]
+
+def store_cached_body(body_path, meta_path, response, meta, chunk_size=65536):
+    """
+    Stream a response body into the cache without holding it in memory.
+
+    The body is decoded chunk by chunk with the response's declared encoding
+    (as response.text would) and stored as UTF-8. Each file is written to a
+    temporary path and moved into place, so a failed download never leaves a
+    partial cache entry.
+    """
+    os.makedirs(os.path.dirname(body_path), exist_ok=True)
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    temp_path = f"{body_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+        for chunk in response.iter_content(chunk_size):
+            f.write(decoder.decode(chunk))
+        f.write(decoder.decode(b'', final=True))
+    os.replace(temp_path, body_path)
+
+    temp_path = f"{meta_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(meta))
+    os.replace(temp_path, meta_path)
+
+def get_with_retries(url, headers, timeout, max_retries, backoff):
+    """
+    GET a URL, retrying connection errors and 429/5xx responses.
+
+    Waits backoff * 2**attempt seconds between tries, or the server's
+    Retry-After when it sends one. The body is streamed, so the caller
+    must consume or close the response.
+
+    Returns:
+        tuple: (response, number of attempts made)
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            response = session.get(url, headers=headers, timeout=timeout, stream=True)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt > max_retries:
+                raise
+            delay = backoff * 2 ** (attempt - 1)
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt > max_retries:
+                return response, attempt
+            response.close()
+            retry_after = response.headers.get('Retry-After', '')
+            delay = float(retry_after) if retry_after.isdigit() else backoff * 2 ** (attempt - 1)
+        logger.warning(f"Retrying {url} in {delay:.1f}s (attempt {attempt} of {max_retries + 1})")
+        time.sleep(delay)
+
+def fetch_csv(url, cache_dir, offline=False, timeout=60, max_retries=4, backoff=1.0, return_text=True):
+    """
+    Download a sheet's CSV export through the on-disk cache.
+
+    A cached copy is revalidated with If-None-Match/If-Modified-Since, so an
+    unchanged sheet costs a 304 instead of a full download. Each sheet is only
+    revalidated once per process; later calls are served straight from disk.
+    New bodies are streamed to disk rather than buffered.
+
+    Args:
+        url (str): CSV export URL
+        cache_dir (str): Directory holding cached bodies and their validators
+        offline (bool): Serve only from the cache, never touching the network
+        timeout (float): Request timeout in seconds
+        max_retries (int): Retries for connection errors and 429/5xx responses
+        backoff (float): Base delay in seconds for exponential backoff
+        return_text (bool): Read the body back into memory; pass False to only fill the cache
+
+    Returns:
+        tuple: (CSV text or None, stats dict with 'status', 'attempts', 'bytes')
+    """
+    key = cache_key(url)
+    body_path, meta_path = cache_paths(cache_dir, key)
+    has_body = os.path.exists(body_path)
+
+    if offline or key in validated_keys:
+        if has_body:
+            logger.debug(f"Using cached CSV for {key}")
+            text = read_cached_body(body_path) if return_text else None
+            return text, {'status': 'cached', 'attempts': 0, 'bytes': os.path.getsize(body_path)}
+        if offline:
+            raise FileNotFoundError(f"No cached CSV for {url} (offline mode)")
+
+    meta = {}
+    if has_body and os.path.exists(meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except ValueError:
+            meta = {}
+
+    headers = {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+
+    response, attempts = get_with_retries(url, headers, timeout, max_retries, backoff)
+    with response:
+        if response.status_code == 304 and has_body:
+            logger.debug(f"CSV for {key} not modified, using cache")
+            status = 'not modified'
+        else:
+            response.raise_for_status()
+            store_cached_body(body_path, meta_path, response, {
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            })
+            status = 'downloaded'
+
+    validated_keys.add(key)
+    text = read_cached_body(body_path) if return_text else None
+    return text, {'status': status, 'attempts': attempts, 'bytes': os.path.getsize(body_path)}
+
+def fetch_csv_text(url, cache_dir, offline=False, timeout=60):
+    """Download a sheet's CSV export through the on-disk cache and return its text"""
+    text, _ = fetch_csv(url, cache_dir, offline=offline, timeout=timeout)
+    return text
+
+def open_csv(url, cache_dir, offline=False, timeout=60):
+    """
+    Download a sheet's CSV export through the on-disk cache and open the cached copy.
+
+    Rows can then be read straight from disk by csv.reader without the whole
+    body ever being held as one string. The caller closes the returned file.
+    """
+    fetch_csv(url, cache_dir, offline=offline, timeout=timeout, return_text=False)
+    return open(cached_csv_path(url, cache_dir), 'r', encoding='utf-8', newline='')
+
+def fetch_all_csv(urls, cache_dir, offline=False, max_workers=8, return_text=True):
+    """
+    Fetch many CSV exports concurrently over the shared session.
+
+    Bodies land in the on-disk cache, so later fetch_csv_text calls for the
+    same URLs in this process are served from disk. A failing sheet does not
+    stop the others; its exception is returned in place of the text.
+
+    Args:
+        urls (list): CSV export URLs
+        cache_dir (str): Directory holding cached bodies and their validators
+        offline (bool): Serve only from the cache, never touching the network
+        max_workers (int): Maximum number of downloads in flight
+        return_text (bool): Keep every body in memory; pass False to only fill the cache
+
+    Returns:
+        tuple: (dict of url -> text (None without return_text) or exception,
+        dict of url -> stats dict with 'seconds')
+    """
+    def timed_fetch(url):
+        start_time = time.time()
+        try:
+            text, stats = fetch_csv(url, cache_dir, offline=offline, return_text=return_text)
+        except Exception as e:
+            text, stats = e, {'status': 'failed', 'attempts': None, 'bytes': 0}
+        stats['seconds'] = time.time() - start_time
+        return url, text, stats
+
+    results = {}
+    timings = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(timed_fetch, url) for url in dict.fromkeys(urls)]
+        for future in as_completed(futures):
+            url, text, stats = future.result()
+            results[url] = text
+            timings[url] = stats
+    return results, timings
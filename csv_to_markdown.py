@@ -1,36 +1,34 @@
 import csv
 import os
-import requests
 from io import StringIO
 import re
-import shutil
+import logging
+from pipeline_log import setup_logging, flush_logging
+from csv_fetch_cache import open_csv
+from vault_writer import commit_vault_files, prune_vault, wait_for_deletes
 
-# Initialize link_dict as a global variable
-link_dict = {}
+# Notes rendered so far, written once their reverse links are known:
+# filepath -> {'content', 'reference', 'links'}
+pending_notes = {}
 
-def cleanup_vault(vault_path):
-    print(f"Cleaning up vault at: {vault_path}")
-    for item in os.listdir(vault_path):
-        item_path = os.path.join(vault_path, item)
-        
-        # Skip the .obsidian folder
-        if item == ".obsidian":
-            print(f"Skipping .obsidian folder: {item_path}")
-            continue
-        
-        # Remove the item (file or folder)
-        try:
-            if os.path.isfile(item_path) or os.path.islink(item_path):
-                os.unlink(item_path)
-                print(f"Deleted file: {item_path}")
-            elif os.path.isdir(item_path):
-                shutil.rmtree(item_path)
-                print(f"Deleted folder: {item_path}")
-        except Exception as e:
-            print(f"Error deleting {item_path}: {e}")
+# Every file this run generates, committed to the vault in one batch at the end:
+# vault-relative path -> content
+vault_writes = {}
 
 # Set your Obsidian vault directory
-vault_path = r"G:\My Drive\Drive\Gaming_Music_Comics_software\Weather Factory\Obsidian" 
+# OBSIDIAN_VAULT_PATH points a run at another vault (benchmarks, test copies)
+vault_path = os.environ.get("OBSIDIAN_VAULT_PATH", r"G:\My Drive\Drive\Gaming_Music_Comics_software\Weather Factory\Obsidian")
+
+# Progress is logged per sheet; set log_level to logging.DEBUG for every note
+# and link, or quiet_mode to show only warnings and errors
+log_level = logging.INFO
+quiet_mode = False
+logger = setup_logging(level=log_level, quiet=quiet_mode)
+
+# Downloaded CSVs are cached here and revalidated with conditional requests;
+# offline_mode builds purely from the cache
+csv_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "csv_cache")
+offline_mode = False
 
 book_of_hours_sheets = {
     'Memories': '57430724'
@@ -83,9 +81,11 @@ def generate_sheet_urls(base_url, sheets_dict):
     for sheet_name, gid in sheets_dict.items():
         sheet_url = base_url.replace("dict_url_reference", gid)
         sheet_urls.append(sheet_url)
-        print(f"Generated sheet URL for {sheet_name}: {sheet_url}")
+        logger.debug(f"Generated sheet URL for {sheet_name}: {sheet_url}")
     return sheet_urls
 
+sheet_urls = generate_sheet_urls(boh_link, book_of_hours_sheets)
+
 # delimiters to split values
 delimiters = [",", ":", "_", "-", " "]
 
@@ -95,13 +95,13 @@ excluded_digits = {"0", "1", "2", "3", "4", "5", "6", "7", "8", "9"}
 
 # Function to extract gid from a sheet URL
 def extract_gid(url):
-    print(f"Extracting gid from URL: {url}")
+    logger.debug(f"Extracting gid from URL: {url}")
     match = re.search(r"gid=(\d+)", url)
     if match:
         gid = match.group(1)
-        print(f"Extracted gid: {gid}")
+        logger.debug(f"Extracted gid: {gid}")
         return gid
-    print("Warning: No gid found in the URL.")
+    logger.warning(f"No gid found in the URL: {url}")
     return None
 
 # Generate CSV export URLs
@@ -111,7 +111,7 @@ for url in sheet_urls:
     if gid:
         csv_url = f"https://docs.google.com/spreadsheets/d/1p1aWr5N0GXdATgP9jM9pB_lL5HHsKEaQDU8zp0h7GMM/export?format=csv&gid={gid}"
         csv_urls.append(csv_url)
-        print(f"Generated CSV export URL: {csv_url}")
+        logger.debug(f"Generated CSV export URL: {csv_url}")
 
 # Sets to store link references
 priority_link_references = set()  # Full words with delimiters
@@ -129,11 +129,10 @@ def split_value(value):
 
 # Step 1: Download the CSV file
 def download_csv(url):
-    print(f"Downloading CSV from URL: {url}")
-    response = requests.get(url)
-    response.raise_for_status()  # Check for errors
-    print("CSV downloaded successfully.")
-    return StringIO(response.text)
+    logger.debug(f"Downloading CSV from URL: {url}")
+    csv_file = open_csv(url, csv_cache_dir, offline=offline_mode)
+    logger.debug("CSV downloaded successfully.")
+    return csv_file
 
 # Function to sanitize a value for Markdown
 def sanitize_value(value):
@@ -157,16 +156,16 @@ def sanitize_link(link):
 
 # Step 2: Create link reference sets
 def create_link_references(csv_data):
-    print("Creating link references...")
+    logger.debug("Creating link references...")
     try:
         reader = csv.DictReader(csv_data)
         if not reader.fieldnames:
-            print("Warning: No headers found in the CSV file.")
+            logger.warning("No headers found in the CSV file.")
             return
         
         # Use the first column header as the folder name (sanitized)
         folder_name = sanitize_value(reader.fieldnames[0])
-        print(f"Using folder name: {folder_name}")
+        logger.debug(f"Using folder name: {folder_name}")
         
         # Add first column values to the priority_link_references set
         csv_data.seek(0)  # Reset the file pointer
@@ -178,29 +177,29 @@ def create_link_references(csv_data):
                     # Sanitize the value before adding to priority_link_references
                     sanitized_value = sanitize_value(first_column_value)
                     priority_link_references.add(f"{folder_name}/{sanitized_value}")
-                    print(f"Added to priority link references: {folder_name}/{sanitized_value}")
+                    logger.debug("Added to priority link references: %s/%s", folder_name, sanitized_value)
     except Exception as e:
-        print(f"Error processing CSV: {e}")
+        logger.error(f"Error processing CSV: {e}")
 
 def process_csv(csv_data, sheet_index):
-    print(f"Processing sheet {sheet_index + 1}...")
+    logger.debug(f"Processing sheet {sheet_index + 1}...")
     try:
         reader = csv.reader(csv_data)
         headers = next(reader)  # Read the header row
         
         if not headers:
-            print(f"Warning: No headers found in the CSV file for sheet {sheet_index + 1}.")
+            logger.warning(f"No headers found in the CSV file for sheet {sheet_index + 1}.")
             return
         
         # Use the first column header as the folder name (sanitized)
         folder_name = sanitize_value(headers[0])
-        print(f"Using folder name: {folder_name}")
+        logger.debug(f"Using folder name: {folder_name}")
         
         sheet_folder = os.path.join(vault_path, folder_name)
         
         # Create a folder for the sheet
         os.makedirs(sheet_folder, exist_ok=True)
-        print(f"Created folder: {sheet_folder}")
+        logger.debug(f"Created folder: {sheet_folder}")
         
         # Track header occurrences to handle duplicates
         header_count = {}
@@ -215,9 +214,11 @@ def process_csv(csv_data, sheet_index):
                 sanitized_headers.append(sanitized_header)
         
         # Loop through rows and create/overwrite Markdown files
+        note_count = 0
+        link_count = 0
         for row in reader:
             if not row:  # Skip empty rows
-                print("Skipping empty row.")
+                logger.debug("Skipping empty row.")
                 continue
             
             # Use the first column as the filename (sanitized)
@@ -230,168 +231,154 @@ def process_csv(csv_data, sheet_index):
             filename = f"{filename}.md"
             filepath = os.path.join(sheet_folder, filename)
             
-            # Initialize the set of linked files for this file
-            if filename not in link_dict:
-                link_dict[filename] = set()
+            # Build Markdown content; it is written once reverse links are known
+            md_file = StringIO()
+            # Write front matter (YAML)
+            md_file.write("---\n")
+            for i, value in enumerate(row):
+                if value and value.strip():  # Only write non-empty fields
+                    # Use the sanitized and numbered header
+                    safe_key = sanitized_headers[i]
+                    safe_value = sanitize_value(value)
+                    md_file.write(f"{safe_key}: {safe_value}\n")
+            md_file.write("---\n\n")
             
-            # Write Markdown content (overwrite if file exists)
-            with open(filepath, 'w', encoding='utf-8') as md_file:
-                # Write front matter (YAML)
-                md_file.write("---\n")
-                for i, value in enumerate(row):
-                    if value and value.strip():  # Only write non-empty fields
-                        # Use the sanitized and numbered header
-                        safe_key = sanitized_headers[i]
-                        safe_value = sanitize_value(value)
-                        md_file.write(f"{safe_key}: {safe_value}\n")
-                md_file.write("---\n\n")
-                
-                # Write main content with links (only linked values)
-                md_file.write("## Links\n")
-                linked_values = set()  # Track linked values to avoid duplicates
-                
-                # Add links based on headers and values
-                for i, value in enumerate(row):
-                    if value and value.strip():  # Only process non-empty cells
-                        # Use the sanitized and numbered header
-                        sanitized_header = sanitized_headers[i]
-                        sanitized_value = sanitize_value(value)
+            # Write main content with links (only linked values)
+            md_file.write("## Links\n")
+            linked_values = set()  # Track linked values to avoid duplicates
+            linked_references = set()  # Full references (with folder) for reverse links
+            
+            # Add links based on headers and values
+            for i, value in enumerate(row):
+                if value and value.strip():  # Only process non-empty cells
+                    # Use the sanitized and numbered header
+                    sanitized_header = sanitized_headers[i]
+                    sanitized_value = sanitize_value(value)
+                    
+                    # Skip if the link matches the current file's name
+                    if sanitized_value == filename_value:
+                        logger.debug("Skipping self-referencing link: [[%s/%s]]", folder_name, sanitized_value)
+                        continue
+                    
+                    # Compare both the header and value to the link references
+                    for reference in priority_link_references:
+                        reference_filename = reference.split("/")[-1]  # Extract filename from reference
                         
-                        # Skip if the link matches the current file's name
-                        if sanitized_value == filename_value:
-                            print(f"Skipping self-referencing link: [[{folder_name}/{sanitized_value}]]")
-                            continue
+                        # Check if the header matches the reference
+                        if sanitized_header == reference_filename:
+                            linked_values.add(f"[[{reference}]]")
+                            linked_references.add(reference)
+                            logger.debug("Added link from header: [[%s]]", reference)
                         
-                        # Compare both the header and value to the link references
-                        for reference in priority_link_references:
-                            reference_filename = reference.split("/")[-1]  # Extract filename from reference
-                            
-                            # Check if the header matches the reference
-                            if sanitized_header == reference_filename:
-                                linked_values.add(f"[[{reference}]]")
-                                link_dict[filename].add(reference)  # Add full reference (with folder)
-                                print(f"Added link from header: [[{reference}]]")
-                            
-                            # Check if the value matches the reference
-                            if sanitized_value == reference_filename:
-                                linked_values.add(f"[[{reference}]]")
-                                link_dict[filename].add(reference)  # Add full reference (with folder)
-                                print(f"Added link from value: [[{reference}]]")
-                
-                # Write unique links
-                for linked_value in sorted(linked_values):
-                    md_file.write(f"- {linked_value}\n")
+                        # Check if the value matches the reference
+                        if sanitized_value == reference_filename:
+                            linked_values.add(f"[[{reference}]]")
+                            linked_references.add(reference)
+                            logger.debug("Added link from value: [[%s]]", reference)
+            
+            # Write unique links
+            for linked_value in sorted(linked_values):
+                md_file.write(f"- {linked_value}\n")
             
-            print(f"Created/Overwritten: {filepath}")
+            pending_notes[filepath] = {
+                'content': md_file.getvalue(),
+                'reference': f"{folder_name}/{filename_value}",
+                'links': linked_references,
+            }
+            note_count += 1
+            link_count += len(linked_references)
+            logger.debug("Rendered: %s", filepath)
+        
+        logger.info(f"Rendered sheet {sheet_index + 1} ({folder_name}): {note_count} notes, {link_count} links")
     except Exception as e:
-        print(f"Error processing sheet {sheet_index + 1}: {e}")
+        logger.error(f"Error processing sheet {sheet_index + 1}: {e}")
 
 def update_reverse_links():
-    print("Updating reverse links...")
+    logger.debug("Updating reverse links...")
     
-    # Step 1: Add reverse links to link_dict
-    for filename, links in link_dict.items():
-        for link in links:
-            # Extract the target filename from the link
-            linked_filename = link.split("/")[-1] + ".md"
-            if linked_filename in link_dict:
-                # Add a reverse link to the target file
-                reverse_link = f"{filename.replace('.md', '')}"
-                link_dict[linked_filename].add(reverse_link)
-                print(f"Added reverse link: [[{reverse_link}]] to {linked_filename}")
+    # Step 1: Collect reverse links from the in-memory link graph
+    reference_paths = {note['reference']: filepath for filepath, note in pending_notes.items()}
+    reverse_links = {filepath: set() for filepath in pending_notes}
+    for filepath, note in pending_notes.items():
+        for link in note['links']:
+            linked_filepath = reference_paths.get(link)
+            if linked_filepath and linked_filepath != filepath:
+                reverse_links[linked_filepath].add(note['reference'])
+                logger.debug("Added reverse link: [[%s]] to %s", note['reference'], linked_filepath)
     
-    # Step 2: Print link_dict for debugging
-    print("\nlink_dict after adding reverse links:")
-    for filename, links in link_dict.items():
-        print(f"{filename}: {links}")
+    logger.info(f"Collected {sum(len(links) for links in reverse_links.values())} reverse links")
     
-    # Step 3: Update each file with the reverse links
-    for filename, links in link_dict.items():
-        filepath = os.path.join(vault_path, filename)
-        if os.path.exists(filepath):
-            with open(filepath, 'r+', encoding='utf-8') as md_file:
-                content = md_file.read()
-                md_file.seek(0)  # Move to the beginning of the file
-                
-                # Check if the file already has a "## Links" section
-                if "## Links" not in content:
-                    # Add the "## Links" section at the end
-                    md_file.seek(0, 2)  # Move to the end of the file
-                    md_file.write("\n## Links\n")
-                    for link in sorted(links):
-                        md_file.write(f"- [[{link}]]\n")
-                    print(f"Added '## Links' section to: {filepath}")
-                else:
-                    # If the section exists, append new links
-                    md_file.seek(0)
-                    lines = md_file.readlines()
-                    md_file.seek(0)
-                    md_file.truncate()  # Clear the file content
-                    
-                    links_section = False
-                    for line in lines:
-                        if line.strip() == "## Links":
-                            links_section = True
-                        md_file.write(line)
-                    
-                    if links_section:
-                        # Append new links to the existing section
-                        for link in sorted(links):
-                            if f"[[{link}]]" not in content:  # Avoid duplicates
-                                md_file.write(f"- [[{link}]]\n")
-                        print(f"Appended links to: {filepath}")
-        else:
-            print(f"File not found: {filepath}")
+    # Step 2: Queue each note once, with reverse links appended to its Links section
+    for filepath, note in pending_notes.items():
+        content = note['content']
+        md_file = StringIO()
+        md_file.write(content)
+        for link in sorted(reverse_links[filepath]):
+            if f"[[{link}]]" not in content:  # Avoid duplicates
+                md_file.write(f"- [[{link}]]\n")
+        vault_writes[vault_relative_path(filepath)] = md_file.getvalue()
+
+def vault_relative_path(filepath):
+    return os.path.relpath(filepath, vault_path).replace('\\', '/')
 
 def write_link_references():
-    print("Writing link references to file...")
+    logger.debug("Writing link references to file...")
     link_reference_file = os.path.join(vault_path, "link_references.txt")
-    with open(link_reference_file, 'w', encoding='utf-8') as f:
-        f.write("Priority Link References:\n")
-        for reference in sorted(priority_link_references):
-            f.write(f"{reference}\n")
-        f.write("\nSecondary Link References:\n")
-        for reference in sorted(secondary_link_references):
-            f.write(f"{reference}\n")
-    print(f"Link references written to: {link_reference_file}")
+    f = StringIO()
+    f.write("Priority Link References:\n")
+    for reference in sorted(priority_link_references):
+        f.write(f"{reference}\n")
+    f.write("\nSecondary Link References:\n")
+    for reference in sorted(secondary_link_references):
+        f.write(f"{reference}\n")
+    vault_writes[vault_relative_path(link_reference_file)] = f.getvalue()
+
+def write_vault():
+    """Write the changed files into the vault, then remove the ones this run no longer generates"""
+    written = commit_vault_files(vault_path, vault_writes)
+    logger.info(f"Wrote {len(written)} of {len(vault_writes)} files")
+    removed = prune_vault(vault_path, vault_path, vault_writes)
+    logger.info(f"Removed {len(removed)} files and folders no longer generated")
 
 # Main function
 def main():
-    print("Starting script...")
-    
-    # Step 0: Clean up the vault
-    print("Step 0: Cleaning up the vault...")
-    cleanup_vault(vault_path)
+    logger.info("Starting script...")
     
     # Step 1: Create link references
-    print("Step 1: Creating link references...")
+    logger.info("Step 1: Creating link references...")
     for i, csv_url in enumerate(csv_urls):
         try:
-            print(f"Processing sheet {i + 1}...")
-            csv_data = download_csv(csv_url)
-            create_link_references(csv_data)
+            logger.debug(f"Processing sheet {i + 1}...")
+            with download_csv(csv_url) as csv_data:
+                create_link_references(csv_data)
         except Exception as e:
-            print(f"Error downloading or processing CSV for sheet {i + 1}: {e}")
+            logger.error(f"Error downloading or processing CSV for sheet {i + 1}: {e}")
     
     # Step 2: Process each CSV
-    print("Step 2: Processing each CSV...")
+    logger.info("Step 2: Processing each CSV...")
     for i, csv_url in enumerate(csv_urls):
         try:
-            print(f"Processing sheet {i + 1}...")
-            csv_data = download_csv(csv_url)
-            process_csv(csv_data, i)
+            logger.debug(f"Processing sheet {i + 1}...")
+            with download_csv(csv_url) as csv_data:
+                process_csv(csv_data, i)
         except Exception as e:
-            print(f"Error processing sheet {i + 1}: {e}")
+            logger.error(f"Error processing sheet {i + 1}: {e}")
     
-    # Step 3: Update reverse links
-    print("Step 3: Updating reverse links...")
+    # Step 3: Add reverse links to the notes
+    logger.info("Step 3: Updating reverse links...")
     update_reverse_links()
     
     # Step 4: Write link references to file
-    print("Step 4: Writing link references to file...")
+    logger.info("Step 4: Writing link references to file...")
     write_link_references()
     
-    print("Script completed successfully.")
+    # Step 5: Swap the new files into the vault and prune stale ones
+    logger.info("Step 5: Writing the vault...")
+    write_vault()
+    
+    wait_for_deletes()
+    logger.info("Script completed successfully.")
+    flush_logging()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
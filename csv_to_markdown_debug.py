@@ -4,34 +4,44 @@ import requests
 from io import StringIO
 import re
 import shutil
+import logging
+from pipeline_log import setup_logging, flush_logging
+from text_linker import build_linker, find_names
 
 # Initialize link_dict as a global variable
 link_dict = {}
 
 def cleanup_vault(vault_path):
-    print(f"Cleaning up vault at: {vault_path}")
+    logger.info(f"Cleaning up vault at: {vault_path}")
     for item in os.listdir(vault_path):
         item_path = os.path.join(vault_path, item)
         
         # Skip the .obsidian folder
         if item == ".obsidian":
-            print(f"Skipping .obsidian folder: {item_path}")
+            logger.debug("Skipping .obsidian folder: %s", item_path)
             continue
         
         # Remove the item (file or folder)
         try:
             if os.path.isfile(item_path) or os.path.islink(item_path):
                 os.unlink(item_path)
-                print(f"Deleted file: {item_path}")
+                logger.debug("Deleted file: %s", item_path)
             elif os.path.isdir(item_path):
                 shutil.rmtree(item_path)
-                print(f"Deleted folder: {item_path}")
+                logger.debug("Deleted folder: %s", item_path)
         except Exception as e:
-            print(f"Error deleting {item_path}: {e}")
+            logger.error(f"Error deleting {item_path}: {e}")
 
 # Set your Obsidian vault directory
 VAULT_PATH = r"G:\My Drive\Drive\Gaming_Music_Comics_software\Book of Hours\Book of Hours"  # Update this to your vault path
 
+# Progress is logged per step; set log_level to logging.DEBUG for the full
+# trace of every note, link and reverse link, or quiet_mode to show only
+# warnings and errors
+log_level = logging.INFO
+quiet_mode = False
+logger = setup_logging(level=log_level, quiet=quiet_mode)
+
 SHEET_URLS = [
     "https://docs.google.com/spreadsheets/d/1p1aWr5N0GXdATgP9jM9pB_lL5HHsKEaQDU8zp0h7GMM/edit?gid=57430724#gid=57430724",
     "https://docs.google.com/spreadsheets/d/1p1aWr5N0GXdATgP9jM9pB_lL5HHsKEaQDU8zp0h7GMM/edit?gid=367912105#gid=367912105",
@@ -72,13 +82,13 @@ EXCLUDED_DIGITS = {"0", "1", "2", "3", "4", "5", "6", "7", "8", "9"}
 
 # Function to extract gid from a sheet URL
 def extract_gid(url):
-    print(f"Extracting gid from URL: {url}")
+    logger.debug(f"Extracting gid from URL: {url}")
     match = re.search(r"gid=(\d+)", url)
     if match:
         gid = match.group(1)
-        print(f"Extracted gid: {gid}")
+        logger.debug(f"Extracted gid: {gid}")
         return gid
-    print("Warning: No gid found in the URL.")
+    logger.warning(f"No gid found in the URL: {url}")
     return None
 
 # Generate CSV export URLs
@@ -88,7 +98,7 @@ for url in SHEET_URLS:
     if gid:
         csv_url = f"https://docs.google.com/spreadsheets/d/1p1aWr5N0GXdATgP9jM9pB_lL5HHsKEaQDU8zp0h7GMM/export?format=csv&gid={gid}"
         CSV_URLS.append(csv_url)
-        print(f"Generated CSV export URL: {csv_url}")
+        logger.debug(f"Generated CSV export URL: {csv_url}")
 
 # Sets to store link references
 priority_link_references = set()  # Full words with delimiters
@@ -106,10 +116,10 @@ def split_value(value):
 
 # Step 1: Download the CSV file
 def download_csv(url):
-    print(f"Downloading CSV from URL: {url}")
+    logger.debug(f"Downloading CSV from URL: {url}")
     response = requests.get(url)
     response.raise_for_status()  # Check for errors
-    print("CSV downloaded successfully.")
+    logger.debug("CSV downloaded successfully.")
     return StringIO(response.text)
 
 # Function to sanitize a value for Markdown
@@ -138,16 +148,16 @@ def sanitize_link(link):
 
 # Step 2: Create link reference sets
 def create_link_references(csv_data):
-    print("Creating link references...")
+    logger.debug("Creating link references...")
     try:
         reader = csv.DictReader(csv_data)
         if not reader.fieldnames:
-            print("Warning: No headers found in the CSV file.")
+            logger.warning("No headers found in the CSV file.")
             return
         
         # Use the first column header as the folder name (sanitized)
         folder_name = sanitize_value(reader.fieldnames[0])
-        print(f"Using folder name: {folder_name}")
+        logger.debug(f"Using folder name: {folder_name}")
         
         # Add first column values to the priority_link_references set
         csv_data.seek(0)  # Reset the file pointer
@@ -159,29 +169,35 @@ def create_link_references(csv_data):
                     # Sanitize the value before adding to priority_link_references
                     sanitized_value = sanitize_value(first_column_value)
                     priority_link_references.add(f"{folder_name}/{sanitized_value}")
-                    print(f"Added to priority link references: {folder_name}/{sanitized_value}")
+                    logger.debug("Added to priority link references: %s/%s", folder_name, sanitized_value)
     except Exception as e:
-        print(f"Error processing CSV: {e}")
+        logger.error(f"Error processing CSV: {e}")
 
 def process_csv(csv_data, sheet_index):
-    print(f"Processing sheet {sheet_index + 1}...")
+    logger.debug(f"Processing sheet {sheet_index + 1}...")
     try:
         reader = csv.reader(csv_data)
         headers = next(reader)  # Read the header row
         
         if not headers:
-            print(f"Warning: No headers found in the CSV file for sheet {sheet_index + 1}.")
+            logger.warning(f"No headers found in the CSV file for sheet {sheet_index + 1}.")
             return
         
         # Use the first column header as the folder name (sanitized)
         folder_name = sanitize_value(headers[0])
-        print(f"Using folder name: {folder_name}")
+        logger.debug(f"Using folder name: {folder_name}")
         
         sheet_folder = os.path.join(VAULT_PATH, folder_name)
         
         # Create a folder for the sheet
         os.makedirs(sheet_folder, exist_ok=True)
-        print(f"Created folder: {sheet_folder}")
+        logger.debug(f"Created folder: {sheet_folder}")
+        
+        # Reference filenames, compiled once per sheet for Transcript linking
+        references_by_filename = {}
+        for reference in priority_link_references:
+            references_by_filename.setdefault(reference.split("/")[-1], []).append(reference)
+        transcript_linker = build_linker(references_by_filename)
         
         # Track header occurrences to handle duplicates
         header_count = {}
@@ -196,9 +212,10 @@ def process_csv(csv_data, sheet_index):
                 sanitized_headers.append(sanitized_header)
         
         # Loop through rows and create/overwrite Markdown files
+        note_count = 0
         for row in reader:
             if not row:  # Skip empty rows
-                print("Skipping empty row.")
+                logger.debug("Skipping empty row.")
                 continue
             
             # Use the first column as the filename (sanitized)
@@ -241,7 +258,7 @@ def process_csv(csv_data, sheet_index):
                         
                         # Skip if the link matches the current file's name
                         if sanitized_value == filename_value:
-                            print(f"Skipping self-referencing link: [[{folder_name}/{sanitized_value}]]")
+                            logger.debug("Skipping self-referencing link: [[%s/%s]]", folder_name, sanitized_value)
                             continue
                         
                         # Compare both the header and value to the link references
@@ -252,79 +269,81 @@ def process_csv(csv_data, sheet_index):
                             if sanitized_header == reference_filename:
                                 linked_values.add(f"[[{reference}]]")
                                 link_dict[full_filename].add(reference)  # Add full reference (with folder)
-                                print(f"Added link from header: [[{reference}]]")
+                                logger.debug("Added link from header: [[%s]]", reference)
                             
                             # Check if the value matches the reference
                             if sanitized_value == reference_filename:
                                 linked_values.add(f"[[{reference}]]")
                                 link_dict[full_filename].add(reference)  # Add full reference (with folder)
-                                print(f"Added link from value: [[{reference}]]")
+                                logger.debug("Added link from value: [[%s]]", reference)
                 
                 # Check if any link (filename) appears in the Transcript value
                 if "Transcript" in headers:
                     transcript_index = headers.index("Transcript")
                     transcript_value = row[transcript_index]
                     if transcript_value:
-                        for reference in priority_link_references:
-                            reference_filename = reference.split("/")[-1]  # Extract filename from reference
-                            if reference_filename in transcript_value:
+                        # Whole words only, longest name winning, in one scan of the transcript
+                        for reference_filename in find_names(transcript_value, transcript_linker):
+                            for reference in references_by_filename[reference_filename]:
                                 linked_values.add(f"[[{reference}]]")
                                 link_dict[full_filename].add(reference)
-                                print(f"Added link from Transcript: [[{reference}]]")
+                                logger.debug("Added link from Transcript: [[%s]]", reference)
                 
                 # Write unique links
                 for linked_value in sorted(linked_values):
                     md_file.write(f"- {linked_value}\n")
             
-            print(f"Created/Overwritten: {filepath}")
+            logger.debug("Created/Overwritten: %s", filepath)
+            note_count += 1
+        logger.info(f"Processed sheet {sheet_index + 1} ({folder_name}): {note_count} notes")
     except Exception as e:
-        print(f"Error processing sheet {sheet_index + 1}: {e}")
+        logger.error(f"Error processing sheet {sheet_index + 1}: {e}")
 
 def update_reverse_links():
-    print("Updating reverse links...")
+    logger.debug("Updating reverse links...")
     
     # Step 1: Collect all links from link_dict
-    print("\nStep 1: Collecting all links from link_dict...")
+    logger.debug("Step 1: Collecting all links from link_dict...")
     all_links = {}
     for filename, links in link_dict.items():
         all_links[filename] = links.copy()  # Store a copy of the links
-        print(f"  Collected links for {filename}: {links}")
-    print(f"\n  all_links after collection: {all_links}")
-    print(f"  link_dict after collection: {link_dict}")
+        logger.debug("  Collected links for %s: %s", filename, links)
+    logger.debug("  all_links after collection: %s", all_links)
+    logger.debug("  link_dict after collection: %s", link_dict)
     
     # Step 2: Build reverse_links dictionary
-    print("\nStep 2: Building reverse_links dictionary...")
+    logger.debug("Step 2: Building reverse_links dictionary...")
     reverse_links = {}
     for filename, links in all_links.items():
-        print(f"\n  Processing file: {filename}")
-        print(f"  Links in this file: {links}")
+        logger.debug("  Processing file: %s", filename)
+        logger.debug("  Links in this file: %s", links)
         for link in links:
-            print(f"\n    Processing link: [[{link}]]")
+            logger.debug("    Processing link: [[%s]]", link)
             # Construct linked_filename by replacing forward slashes with backslashes and adding .md
             linked_filename = link.replace("/", "\\") + ".md"
-            print(f"    Constructed linked_filename: {linked_filename} (added '.md' to the link)")
+            logger.debug("    Constructed linked_filename: %s (added '.md' to the link)", linked_filename)
             
             if linked_filename not in reverse_links:
                 reverse_links[linked_filename] = set()
-                print(f"    Initialized reverse_links for {linked_filename}")
+                logger.debug("    Initialized reverse_links for %s", linked_filename)
             
             reverse_link = filename.replace(".md", "").replace("\\", "/")
             reverse_links[linked_filename].add(reverse_link)
-            print(f"    Added reverse link: [[{reverse_link}]] to {linked_filename}")
-            print(f"    Updated reverse_links: {reverse_links}")
+            logger.debug("    Added reverse link: [[%s]] to %s", reverse_link, linked_filename)
+            logger.debug("    Updated reverse_links: %s", reverse_links)
     
-    print(f"\n  reverse_links after building: {reverse_links}")
-    print(f"  link_dict after building reverse_links: {link_dict}")
+    logger.debug("  reverse_links after building: %s", reverse_links)
+    logger.debug("  link_dict after building reverse_links: %s", link_dict)
     
     # Step 3: Update each file with reverse links
-    print("\nStep 3: Updating files with reverse links...")
+    logger.debug("Step 3: Updating files with reverse links...")
     for filename, links in link_dict.items():
-        print(f"\n  Processing file: {filename}")
-        print(f"  Links in this file: {links}")
+        logger.debug("  Processing file: %s", filename)
+        logger.debug("  Links in this file: %s", links)
         
         # Construct the full file path (including folder)
         filepath = os.path.join(VAULT_PATH, filename)
-        print(f"  Full file path: {filepath}")
+        logger.debug("  Full file path: %s", filepath)
         
         if os.path.exists(filepath):
             with open(filepath, 'r+', encoding='utf-8') as md_file:
@@ -338,7 +357,7 @@ def update_reverse_links():
                     md_file.write("\n## Links\n")
                     for link in sorted(links):
                         md_file.write(f"- [[{link.replace('\\', '/')}]]\n")
-                    print(f"    Added '## Links' section to: {filepath}")
+                    logger.debug("    Added '## Links' section to: %s", filepath)
                 else:
                     # If the section exists, append new links
                     md_file.seek(0)
@@ -357,24 +376,24 @@ def update_reverse_links():
                         for link in sorted(links):
                             if f"[[{link.replace('\\', '/')}]]" not in content:  # Avoid duplicates
                                 md_file.write(f"- [[{link.replace('\\', '/')}]]\n")
-                        print(f"    Appended links to: {filepath}")
+                        logger.debug("    Appended links to: %s", filepath)
                 
                 # Add reverse links if they exist
                 if filename in reverse_links:
-                    print(f"    Found reverse links for {filename}: {reverse_links[filename]}")
+                    logger.debug("    Found reverse links for %s: %s", filename, reverse_links[filename])
                     for reverse_link in sorted(reverse_links[filename]):
                         if f"[[{reverse_link.replace('\\', '/')}]]" not in content:  # Avoid duplicates
                             md_file.write(f"- [[{reverse_link.replace('\\', '/')}]]\n")
-                            print(f"    Added reverse link: [[{reverse_link.replace('\\', '/')}]] to {filename}")
+                            logger.debug("    Added reverse link: [[%s]] to %s", reverse_link.replace('\\', '/'), filename)
                 else:
-                    print(f"    No reverse links found for {filename}")
+                    logger.debug("    No reverse links found for %s", filename)
         else:
-            print(f"    File not found: {filepath}")
+            logger.warning(f"File not found: {filepath}")
     
-    print("\nUpdate complete.")
+    logger.info(f"Updated reverse links of {len(link_dict)} notes")
 
 def write_link_references():
-    print("Writing link references to file...")
+    logger.debug("Writing link references to file...")
     link_reference_file = os.path.join(VAULT_PATH, "link_references.txt")
     with open(link_reference_file, 'w', encoding='utf-8') as f:
         f.write("Priority Link References:\n")
@@ -383,45 +402,46 @@ def write_link_references():
         f.write("\nSecondary Link References:\n")
         for reference in sorted(secondary_link_references):
             f.write(f"{reference}\n")
-    print(f"Link references written to: {link_reference_file}")
+    logger.info(f"Link references written to: {link_reference_file}")
 
 # Main function
 def main():
-    print("Starting script...")
+    logger.info("Starting script...")
     
     # Step 0: Clean up the vault
-    print("Step 0: Cleaning up the vault...")
+    logger.info("Step 0: Cleaning up the vault...")
     cleanup_vault(VAULT_PATH)
     
     # Step 1: Create link references
-    print("Step 1: Creating link references...")
+    logger.info("Step 1: Creating link references...")
     for i, csv_url in enumerate(CSV_URLS):
         try:
-            print(f"Processing sheet {i + 1}...")
+            logger.debug(f"Processing sheet {i + 1}...")
             csv_data = download_csv(csv_url)
             create_link_references(csv_data)
         except Exception as e:
-            print(f"Error downloading or processing CSV for sheet {i + 1}: {e}")
+            logger.error(f"Error downloading or processing CSV for sheet {i + 1}: {e}")
     
     # Step 2: Process each CSV
-    print("Step 2: Processing each CSV...")
+    logger.info("Step 2: Processing each CSV...")
     for i, csv_url in enumerate(CSV_URLS):
         try:
-            print(f"Processing sheet {i + 1}...")
+            logger.debug(f"Processing sheet {i + 1}...")
             csv_data = download_csv(csv_url)
             process_csv(csv_data, i)
         except Exception as e:
-            print(f"Error processing sheet {i + 1}: {e}")
+            logger.error(f"Error processing sheet {i + 1}: {e}")
     
     # Step 3: Update reverse links
-    print("Step 3: Updating reverse links...")
+    logger.info("Step 3: Updating reverse links...")
     update_reverse_links()
     
     # Step 4: Write link references to file
-    print("Step 4: Writing link references to file...")
+    logger.info("Step 4: Writing link references to file...")
     write_link_references()
     
-    print("Script completed successfully.")
+    logger.info("Script completed successfully.")
+    flush_logging()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
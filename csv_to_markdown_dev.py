@@ -1,118 +1,158 @@
 import csv
 import os
-import requests
+import sys
 from io import StringIO
 import re
-import shutil
 import itertools
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import time
 from functools import lru_cache
+from contextlib import contextmanager
+import cProfile
 import logging
 from datetime import datetime
 from collections import defaultdict
+import hashlib
+import json
+import zlib
+from pipeline_log import setup_logging, flush_logging, start_worker_logging, stop_worker_logging, log_to_queue
+from csv_fetch_cache import open_csv, fetch_all_csv, cached_csv_path, validated_keys
+from vault_writer import commit_vault_files, prune_vault, delete_files, wait_for_deletes
+try:
+    import resource
+except ImportError:  # Windows has no resource module; peak RSS is then left out of the report
+    resource = None
+from markdown_sanitize import sanitize_value, sanitize_filename, sanitize_cell_value
+from sheet_diff import diff_rows
+from text_linker import build_linker, find_all_names
+from note_render import (
+    get_apostrophe_variants, normal_row_filepath, row_link_texts, render_normal_rows, render_history_years,
+    render_in_pool, shutdown_render_pool,
+)
 
 # Global cache for note contents
 note_content_cache = {}
 
-# Initialize link_dict as a global variable
-link_dict = {}
+# Keyword spelling -> cached notes mentioning it as a whole word/phrase,
+# built with one linker scan per note for the Keywords sheet being processed
+keyword_note_index = {}
 
-def cleanup_vault(vault_path):
-    print(f"Cleaning up vault at: {vault_path}")
-    for item in os.listdir(vault_path):
-        item_path = os.path.join(vault_path, item)
-        
-        if item == ".obsidian":
-            print(f"Skipping .obsidian folder: {item_path}")
-            continue
-        
-        try:
-            if os.path.isfile(item_path) or os.path.islink(item_path):
-                os.unlink(item_path)
-                print(f"Deleted file: {item_path}")
-            elif os.path.isdir(item_path):
-                shutil.rmtree(item_path)
-                print(f"Deleted folder: {item_path}")
-        except Exception as e:
-            print(f"Error deleting {item_path}: {e}")
+# Notes rendered this run, written once their reverse links are known:
+# relative path -> {'filepath', 'content', 'reference', 'links'}
+pending_notes = {}
 
-vault_path = r"G:\My Drive\Drive\Gaming_Music_Comics_software\Weather Factory\Obsidian"
+# OBSIDIAN_VAULT_PATH points a run at another vault (benchmarks, test copies)
+vault_path = os.environ.get("OBSIDIAN_VAULT_PATH", r"G:\My Drive\Drive\Gaming_Music_Comics_software\Weather Factory\Obsidian")
 
-# Set up logging at the start of your script (right after imports)
+# Set up logging at the start of your script (right after imports). Per-note and
+# per-link detail is logged at DEBUG; set log_level to logging.DEBUG to see it,
+# or quiet_mode to keep the console to warnings and errors
 log_file = os.path.join(vault_path, "obsidian_import_log.txt")
-logging.basicConfig(
-    filename=log_file,
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filemode='w'  # Overwrite existing log
-)
-logger = logging.getLogger()
-
-book_of_hours_sheets = {
-    'Memories': '57430724',
-    'Consider Masterlist': '432406626',
-    'BoH Books': '161140297',
-    'Skills': '887548006',
-    'Wisdom Branch': '1238682685',
-    'Sustenance': '652283921',
-    'Inedible Cooking Ingredient': '126757897',
-    'Beverages': '367912105',
-    'Candles': '745028529',
-    'Flowers': '2030685183',
-    'Pets': '1839755106',
-    'Explorable': '203136705',
-    'Purchasable': '484734701',
-    'Crafted Product': '1675846500',
-    'Crafting Recipe': '1760695989',
-    'Rooms': '1889312489',
-    'Workstations': '1351975106',
-    'Visitors': '1721650548',
-    'Assistance': '1059413647',
-    'Exploration': '1937107873',
-    'Incidents': '1163393403',
-    'History': '1252134190',
-    'Conversations': '605494400',
-    'Hours': '1981936845',
-    'Weather': '1191136372',
-    'Principle': '1007960833',
-    'Soul Card': '338064931',
-    'Keywords': '1084909450',
-    'Player Librarians': '1610034163',
-    'History Victory': '1427507298',
-    'Lighthouse Institute Victory': '873533606',
-}
-
-boh_link = "https://docs.google.com/spreadsheets/d/1p1aWr5N0GXdATgP9jM9pB_lL5HHsKEaQDU8zp0h7GMM/edit?gid=dict_url_reference#gid=dict_url_reference"
-
-subfolders_dict = {
-    'Book of Hours': {
-        'folder_name': 'Book of Hours',
-        'sheets': book_of_hours_sheets,
-        'link_template': boh_link
+log_level = logging.INFO
+quiet_mode = False
+if multiprocessing.parent_process() is None:
+    logger = setup_logging(log_file, level=log_level, quiet=quiet_mode)
+else:
+    # A worker process importing this script logs through its parent (see build_games)
+    logger = logging.getLogger()
+
+# Every spreadsheet in sheets.json is built into its own vault subfolder
+sheets_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sheets.json")
+
+def load_subfolders(sheets_file):
+    with open(sheets_file, 'r', encoding='utf-8') as f:
+        spreadsheets = json.load(f)
+    return {
+        subfolder_key: {
+            'folder_name': spreadsheet['name'],
+            'sheets': spreadsheet['sheets'],
+            'link_template': spreadsheet['link_template'],
+            'keyword_sheets': spreadsheet.get('keyword_sheets'),
+        }
+        for subfolder_key, spreadsheet in spreadsheets.items()
     }
-}
 
+subfolders_dict = load_subfolders(sheets_file)
+
+# Keyword sheets of spreadsheets that don't list their own in sheets.json
 keyword_sheets = ["Keywords", "Glossary"]
 
+# Incremental builds: reuse notes of sheets whose CSV and link references are
+# unchanged since the last run, and only rewrite notes whose content changed
+incremental_build = True
+manifest_file = os.path.join(vault_path, "obsidian_import_manifest.json")
+manifest_version = 3
+
+previous_manifest = {'sheets': {}, 'notes': {}}
+current_manifest = {'sheets': {}, 'notes': {}}
+written_notes = []
+
+# Downloaded CSVs are cached here and revalidated with conditional requests;
+# offline_mode builds purely from the cache
+csv_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "csv_cache")
+offline_mode = False
+download_concurrency = 8
+
+# Sheet keys ("Subfolder/Sheet") to rebuild on their own, e.g. ["Book of Hours/Skills"].
+# Every other sheet is restored from the build manifest without being downloaded;
+# their notes keep the links they were built with. Empty rebuilds every sheet.
+refresh_only_sheets = []
+
+# Watch mode keeps the vault in sync: every watch_interval seconds each sheet is
+# revalidated with a conditional request, and only when one changed is the
+# vault rebuilt, diffing changed sheets row by row against the copy parsed on
+# the previous poll
+watch_mode = False
+watch_interval = 60
+
+# Sheet key -> (csv_hash, parsed sheet) as last built, kept in watch mode only
+sheet_snapshots = {}
+
+# Worker processes rendering large sheets; 1 renders everything in this process
+render_workers = os.cpu_count() or 1
+
+# Worker processes building spreadsheets (games) side by side; 1 builds them one
+# after another in this process. Each game links only among its own sheets
+# while it is built; links between games are resolved once all are merged.
+game_workers = os.cpu_count() or 1
+
+# Settings a game worker takes from this process, for start methods that
+# re-import the script instead of forking
+game_worker_settings = (
+    'csv_cache_dir', 'offline_mode', 'download_concurrency', 'refresh_only_sheets', 'watch_mode', 'log_level',
+)
+
+# Per-stage and per-sheet timings are written to report_file after every run;
+# set profile_run to also dump cProfile stats (open with pstats or snakeviz)
+report_file = os.path.join(vault_path, "obsidian_import_report.json")
+profile_run = False
+profile_file = os.path.join(vault_path, "obsidian_import_profile.prof")
+run_report = {'stages': {}, 'stage_rss_mb': {}, 'sheets': {}, 'files_written': 0, 'bytes_written': 0}
+written_bytes = {}
+
 def generate_sheet_urls(base_url, sheets_dict):
     sheet_urls = []
     for sheet_name, gid in sheets_dict.items():
-        sheet_url = base_url.replace("dict_url_reference", gid)
+        sheet_url = base_url.replace("gid_value", gid)
         sheet_urls.append(sheet_url)
-        print(f"Generated sheet URL for {sheet_name}: {sheet_url}")
+        logger.debug(f"Generated sheet URL for {sheet_name}: {sheet_url}")
     return sheet_urls
 
 def extract_gid(url):
-    print(f"Extracting gid from URL: {url}")
+    logger.debug(f"Extracting gid from URL: {url}")
     match = re.search(r"gid=(\d+)", url)
     if match:
         gid = match.group(1)
-        print(f"Extracted gid: {gid}")
+        logger.debug(f"Extracted gid: {gid}")
         return gid
-    print("Warning: No gid found in the URL.")
+    logger.warning(f"No gid found in the URL: {url}")
     return None
 
+def get_keyword_sheets(subfolder_key):
+    sheets = subfolders_dict[subfolder_key]['keyword_sheets']
+    return keyword_sheets if sheets is None else sheets
+
 processed_data = {}
 
 for subfolder_key, subfolder_data in subfolders_dict.items():
@@ -131,12 +171,13 @@ for subfolder_key, subfolder_data in subfolders_dict.items():
         'csv_urls': []
     }
     
+    spreadsheet_url = subfolder_data['link_template'].split('/edit')[0]
     for url in sheet_urls:
         gid = extract_gid(url)
         if gid:
-            csv_url = f"https://docs.google.com/spreadsheets/d/1p1aWr5N0GXdATgP9jM9pB_lL5HHsKEaQDU8zp0h7GMM/export?format=csv&gid={gid}"
+            csv_url = f"{spreadsheet_url}/export?format=csv&gid={gid}"
             processed_data[subfolder_key]['csv_urls'].append(csv_url)
-            print(f"Generated CSV export URL: {csv_url}")
+            logger.debug(f"Generated CSV export URL: {csv_url}")
 
 delimiters = [",", ":", "_", "-", " "]
 excluded_words = {"the", "a", "an", "and", "or", "of", "in", "to", "for", "with", "on", "at", "by", "as"}
@@ -145,6 +186,52 @@ excluded_digits = {"0", "1", "2", "3", "4", "5", "6", "7", "8", "9"}
 priority_link_references = set()
 secondary_link_references = set()
 
+# Maps a reference's filename (last path segment) to every full reference
+# with that filename, so cells are matched by lookup instead of a scan
+link_reference_index = defaultdict(set)
+
+# Order-independent digest of priority_link_references (XOR of reference hashes),
+# used to tell whether a sheet's links could have changed since the last build.
+# Other games' references, linkable from the start of a game's build, count too.
+link_references_digest = 0
+
+# Other games' references this game's notes link to, now and as the previous build linked them
+foreign_link_references = set()
+previous_foreign_references = set()
+
+# Reverse dependency graph of the sheet being built: link name key -> notes
+# whose links were looked up under that name. It is saved with the sheet in the
+# build manifest, so when references change only the notes that looked up a
+# changed name are re-rendered (see relink_unchanged_sheet)
+sheet_dependents = defaultdict(set)
+
+def reference_digest(reference):
+    return int(hashlib.sha1(reference.encode('utf-8')).hexdigest(), 16)
+
+def add_priority_link_reference(reference):
+    global link_references_digest
+    if reference not in priority_link_references:
+        link_references_digest ^= reference_digest(reference)
+    priority_link_references.add(reference)
+    link_reference_index[reference.split("/")[-1]].add(reference)
+
+def add_foreign_link_reference(reference):
+    """Make another game's reference linkable without it becoming one of this game's own"""
+    global link_references_digest
+    foreign_link_references.add(reference)
+    link_references_digest ^= reference_digest(reference)
+    link_reference_index[reference.split("/")[-1]].add(reference)
+
+def link_name_key(name):
+    """Short stable key for a link lookup name; a collision only costs an extra re-render"""
+    return format(zlib.crc32(name.encode('utf-8')), '08x')
+
+def record_link_dependents(row, sanitized_headers, filename_value, filepath):
+    rel_path = vault_relative_path(filepath)
+    for text in row_link_texts(row, sanitized_headers, filename_value):
+        for name in get_apostrophe_variants(text):
+            sheet_dependents[link_name_key(name)].add(rel_path)
+
 def split_value(value):
     parts = [value]
     for delimiter in delimiters:
@@ -155,140 +242,105 @@ def split_value(value):
     return [part.strip() for part in parts if part.strip()]
 
 def download_csv(url):
-    print(f"Downloading CSV from URL: {url}")
-    response = requests.get(url)
-    response.raise_for_status()
-    print("CSV downloaded successfully.")
-    return StringIO(response.text)
-
-def escape_markdown(text):
-    chars_to_escape = {'\\', '#', '^', '|', '{', '}'}
-    escaped_text = []
-    for char in text:
-        if char in chars_to_escape:
-            escaped_text.append('\\' + char)
-        else:
-            escaped_text.append(char)
-    return ''.join(escaped_text)
-
-def sanitize_value(value):
-    value = value.strip()
-    value = escape_markdown(value)
-    return value
+    """Fetch a sheet into the CSV cache and return the cached file, opened for streaming reads"""
+    logger.debug(f"Downloading CSV from URL: {url}")
+    csv_file = open_csv(url, csv_cache_dir, offline=offline_mode)
+    logger.debug("CSV downloaded successfully.")
+    return csv_file
 
-def sanitize_filename(filename):
-    filename = filename.replace(':', '_')
-    filename = re.sub(r'[\\/*?:"<>|]', '_', filename)
-    return filename
+def hash_csv(csv_data, chunk_size=65536):
+    """Hash a CSV stream chunk by chunk, leaving it rewound for parsing"""
+    digest = hashlib.sha1()
+    csv_data.seek(0)
+    for chunk in iter(lambda: csv_data.read(chunk_size), ''):
+        digest.update(chunk.encode('utf-8'))
+    csv_data.seek(0)
+    return digest.hexdigest()
 
 def sanitize_link(link):
     return link.replace(':', '_')
 
-def create_link_references(csv_data, sheet_name, subfolder_name):
-    print(f"Creating link references for sheet: {sheet_name} in {subfolder_name}...")
+def parse_sheet(csv_data):
+    """Parse a downloaded CSV once into headers and data rows shared by every stage"""
+    csv_data.seek(0)
+    rows = list(csv.reader(csv_data))
+    return {
+        'headers': rows[0] if rows else [],
+        'rows': rows[1:],
+        'columns': {},
+    }
+
+def get_sheet_column(sheet, col_index):
+    """Column-major view of one column, built on first use; short rows read as empty"""
+    if col_index not in sheet['columns']:
+        sheet['columns'][col_index] = [row[col_index] if len(row) > col_index else "" for row in sheet['rows']]
+    return sheet['columns'][col_index]
+
+def create_link_references(sheet, sheet_name, subfolder_name):
+    logger.debug(f"Creating link references for sheet: {sheet_name} in {subfolder_name}...")
     try:
-        reader = csv.DictReader(csv_data)
-        if not reader.fieldnames:
-            print("Warning: No headers found in the CSV file.")
+        if not sheet['headers']:
+            logger.warning(f"No headers found in the CSV file for sheet: {sheet_name}")
             return
         
-        folder_name = sanitize_value(reader.fieldnames[0])
-        print(f"Using folder name: {folder_name}")
-        
-        is_keywords_sheet = (sheet_name == "Keywords")
-        
-        csv_data.seek(0)
-        next(reader)
-        for row in reader:
-            if reader.fieldnames and row:
-                first_column_value = row[reader.fieldnames[0]]
-                if first_column_value.strip():
-                    sanitized_value = sanitize_value(first_column_value)
-                    full_reference = f"{subfolder_name}/{folder_name}/{sanitized_value}"
-                    priority_link_references.add(full_reference)
-                    print(f"Added to priority link references: {full_reference}")
-                    
-                    if is_keywords_sheet:
-                        for header in reader.fieldnames[1:]:
-                            if header in row and row[header].strip():
-                                sanitized_cell_value = sanitize_value(row[header])
-                                full_cell_reference = f"{subfolder_name}/{folder_name}/{sanitized_cell_value}"
-                                priority_link_references.add(full_cell_reference)
-                                print(f"Added Keywords sheet value to priority links: {full_cell_reference}")
+        for full_reference in sheet_references(sheet, sheet_name, subfolder_name):
+            add_priority_link_reference(full_reference)
+            logger.debug("Added to priority link references: %s", full_reference)
     except Exception as e:
-        print(f"Error processing CSV: {e}")
+        logger.error(f"Error processing CSV for sheet {sheet_name}: {e}")
 
-def sanitize_cell_value(value):
-    if not value:
-        return ""
-    value = ' '.join(value.splitlines())
-    if ':' in value:
-        value = value.replace(': ', '：')
-    return value.strip()
-
-def get_apostrophe_variants(text):
-    variants = {text}
-    
-    if "'" in text:
-        variants.add(text.replace("'", ""))
-        variants.add(text.replace("'", " "))
-    
-    if text.endswith("'s"):
-        base = text[:-2]
-        variants.update({
-            base,
-            base + "s",
-            base + "'",
-            base + "s'"
-        })
-    elif text.endswith("s'"):
-        base = text[:-1]
-        variants.update({
-            base,
-            base + "s",
-            base + "'s",
-            base[:-1]
-        })
-    elif text.endswith("s"):
-        variants.update({
-            text + "'",
-            text + "'s",
-            text[:-1] + "'",
-            text[:-1] + "'s"
-        })
-    
-    return variants
-
-def process_csv(csv_data, sheet_index, subfolder_key, keyword_sheets):
+def sheet_references(sheet, sheet_name, subfolder_name):
+    """The priority link references of a sheet: its first-column values, and every value of a Keywords sheet"""
+    headers = sheet['headers']
+    if not headers:
+        return []
+    
+    folder_name = sanitize_value(headers[0])
+    is_keywords_sheet = (sheet_name == "Keywords")
+    
+    references = []
+    for row in sheet['rows']:
+        if row:
+            first_column_value = row[0]
+            if first_column_value.strip():
+                sanitized_value = sanitize_value(first_column_value)
+                references.append(f"{subfolder_name}/{folder_name}/{sanitized_value}")
+                
+                if is_keywords_sheet:
+                    for cell_value in row[1:len(headers)]:
+                        if cell_value.strip():
+                            sanitized_cell_value = sanitize_value(cell_value)
+                            references.append(f"{subfolder_name}/{folder_name}/{sanitized_cell_value}")
+    return references
+
+def process_csv(sheet, sheet_index, subfolder_key, keyword_sheets):
     """Process CSV data with proper sheet identification"""
     try:
         # Get the actual sheet name from our configuration
         sheet_name = list(subfolders_dict[subfolder_key]['sheets'].keys())[sheet_index]
-        logger.info(f"Starting to process sheet: {sheet_name} (index: {sheet_index})")
+        logger.debug(f"Starting to process sheet: {sheet_name} (index: {sheet_index})")
         
-        csv_data.seek(0)
-        reader = csv.reader(csv_data)
-        headers = [h.strip() for h in next(reader)]
+        headers = [h.strip() for h in sheet['headers']]
         
         if not headers:
             logger.warning(f"Empty sheet {sheet_name}")
             return
             
-        logger.info(f"Headers found: {headers}")
+        logger.debug(f"Headers found: {headers}")
         
         if sheet_name in keyword_sheets:
-            logger.info("Processing as keyword sheet")
-            process_keywords_sheet(csv_data, reader, headers, subfolder_key, processed_data[subfolder_key])
+            logger.debug("Processing as keyword sheet")
+            process_keywords_sheet(sheet, headers, subfolder_key, processed_data[subfolder_key])
         else:
-            logger.info("Processing as normal sheet")
-            process_normal_sheet(csv_data, sheet_index, subfolder_key, processed_data[subfolder_key])
+            logger.debug("Processing as normal sheet")
+            process_normal_sheet(sheet, sheet_index, subfolder_key, processed_data[subfolder_key])
             
     except Exception as e:
         logger.error(f"Error processing sheet {sheet_index}: {str(e)}", exc_info=True)
         raise
 
-def process_keywords_sheet(csv_data, reader, headers, subfolder_key, subfolder_data):
-    print("Processing Keywords sheet with column-based subfolders")
+def process_keywords_sheet(sheet, headers, subfolder_key, subfolder_data):
+    logger.debug("Processing Keywords sheet with column-based subfolders")
     
     keywords_base_folder = os.path.join(subfolder_data['vault_path'], "Keywords")
     os.makedirs(keywords_base_folder, exist_ok=True)
@@ -296,41 +348,53 @@ def process_keywords_sheet(csv_data, reader, headers, subfolder_key, subfolder_d
     if 'sheet_folders' not in processed_data[subfolder_key]:
         processed_data[subfolder_key]['sheet_folders'] = {}
     
+    index_keyword_mentions(sheet, headers)
+    
     for col_index, header in enumerate(headers):
         if not header:
             continue
             
-        process_keywords_column(csv_data, col_index, header, subfolder_key, keywords_base_folder)
+        process_keywords_column(sheet, col_index, header, subfolder_key, keywords_base_folder)
 
-def process_keywords_column(csv_data, col_index, header, subfolder_key, base_folder):
+def process_keywords_column(sheet, col_index, header, subfolder_key, base_folder):
     header_folder_name = sanitize_value(header).replace(':', '_')
     header_folder = os.path.join(base_folder, header_folder_name)
     os.makedirs(header_folder, exist_ok=True)
     
-    csv_data.seek(0)
-    reader = csv.reader(csv_data)
-    next(reader)
-    
     processed_values = set()
     
-    for row in reader:
-        if len(row) > col_index and row[col_index].strip():
-            value = row[col_index].strip()
+    for cell_value in get_sheet_column(sheet, col_index):
+        if cell_value.strip():
+            value = cell_value.strip()
             if value not in processed_values:
                 processed_values.add(value)
                 create_keyword_file(value, header_folder_name, subfolder_key, header_folder)
                 
                 filename_value = sanitize_value(value).replace(':', '_')
                 full_reference = f"{subfolder_key}/Keywords/{header_folder_name}/{filename_value}"
-                priority_link_references.add(full_reference)
-                print(f"Added to priority links: {full_reference}")
+                add_priority_link_reference(full_reference)
+                logger.debug("Added to priority links: %s", full_reference)
     
     folder_key = f"Keywords/{header_folder_name}"
     processed_data[subfolder_key]['sheet_folders'][folder_key] = {
-        'items': [v.replace(':', '_') for v in processed_values],
+        # Sorted, so an unchanged sheet records the same manifest entry every run
+        'items': sorted(v.replace(':', '_') for v in processed_values),
         'path': header_folder
     }
 
+def keyword_sheet_references(sheet, subfolder_key):
+    """The references process_keywords_sheet creates: one per distinct value of each column"""
+    references = set()
+    for col_index, header in enumerate(h.strip() for h in sheet['headers']):
+        if not header:
+            continue
+        header_folder_name = sanitize_value(header).replace(':', '_')
+        for cell_value in get_sheet_column(sheet, col_index):
+            if cell_value.strip():
+                filename_value = sanitize_value(cell_value.strip()).replace(':', '_')
+                references.add(f"{subfolder_key}/Keywords/{header_folder_name}/{filename_value}")
+    return references
+
 def create_keyword_file(value, header_folder_name, subfolder_key, header_folder):
     filename_value = sanitize_value(value).replace(':', '_')
     base_filename = sanitize_filename(filename_value)
@@ -339,74 +403,80 @@ def create_keyword_file(value, header_folder_name, subfolder_key, header_folder)
     
     linked_notes = find_notes_referencing_keyword(value)
     
-    with open(filepath, 'w', encoding='utf-8') as md_file:
-        if linked_notes:
-            md_file.write("## Linked Notes\n")
-            for note in sorted(linked_notes):
-                md_file.write(f"- [[{note}]]\n")
+    md_file = StringIO()
+    if linked_notes:
+        md_file.write("## Linked Notes\n")
+        for note in sorted(linked_notes):
+            md_file.write(f"- [[{note}]]\n")
+    reference = f"{subfolder_key}/Keywords/{header_folder_name}/{filename_value}"
+    stage_note(filepath, md_file.getvalue(), reference, linked_notes)
     
-    print(f"Created keyword file with {len(linked_notes)} links: {filepath}")
+    logger.debug("Created keyword file with %s links: %s", len(linked_notes), filepath)
+
+def index_keyword_mentions(sheet, headers):
+    """
+    Find which cached notes mention each keyword of the sheet, in every apostrophe spelling.
+
+    All spellings go into one linker, so each note is scanned once instead of
+    searching every note once per keyword.
+    """
+    phrases = set()
+    for col_index, header in enumerate(headers):
+        if not header:
+            continue
+        for cell_value in get_sheet_column(sheet, col_index):
+            if cell_value.strip():
+                phrases.update(get_apostrophe_variants(sanitize_value(cell_value.strip()).replace(':', '_')))
+    
+    # Strict boundaries, as the \b-delimited regex this index replaced
+    linker = build_linker(phrases, ignore_case=True, strict=True)
+    keyword_note_index.clear()
+    for note_path, content in get_cached_notes():
+        if "Keywords/" in note_path.replace('\\', '/'):
+            continue
+        for phrase in find_all_names(content, linker):
+            keyword_note_index.setdefault(phrase, set()).add(note_path)
 
 def find_notes_referencing_keyword(keyword_value):
     linked_notes = set()
     sanitized_keyword = sanitize_value(keyword_value).replace(':', '_')
     
-    cached_notes = get_cached_notes()
-    
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        futures = []
-        for note_path, note_content in cached_notes:
-            futures.append(
-                executor.submit(
-                    check_note_for_keyword,
-                    note_path,
-                    note_content,
-                    sanitized_keyword
-                )
-            )
-        
-        for future in futures:
-            result = future.result()
-            if result:
-                linked_notes.add(result)
+    for variant in get_apostrophe_variants(sanitized_keyword):
+        for note_path in keyword_note_index.get(variant, ()):
+            linked_notes.add(convert_path_to_reference(note_path))
     
     return linked_notes
 
-def check_note_for_keyword(note_path, note_content, sanitized_keyword):
-    if "Keywords/" in note_path:
-        return None
-        
-    for variant in get_apostrophe_variants(sanitized_keyword):
-        if re.search(r'\b' + re.escape(variant) + r'\b', note_content, re.IGNORECASE):
-            return convert_path_to_reference(note_path)
-    return None
-
+@lru_cache(maxsize=None)
 def convert_path_to_reference(filepath):
-    rel_path = os.relpath(filepath, start=vault_path)
-    ref_path = rel_path[:-3].replace('\\', '/')
     subfolder_key = next(k for k in processed_data if filepath.startswith(processed_data[k]['vault_path']))
+    rel_path = os.path.relpath(filepath, start=processed_data[subfolder_key]['vault_path'])
+    ref_path = rel_path[:-3].replace('\\', '/')
     return f"{subfolder_key}/{ref_path}"
 
 def get_cached_notes():
     if not note_content_cache:
-        print("Building note content cache...")
+        logger.debug("Building note content cache...")
         start_time = time.time()
+        cache_start = time.perf_counter()
+        
+        for rel_path, note in pending_notes.items():
+            if rel_path.endswith('.md'):
+                note_content_cache[note['filepath']] = strip_foreign_links(note['content'], note, note['filepath'])
         
+        # Notes carried over from the previous build are read back from disk,
+        # without the reverse links that build appended to them
+        carried_paths = {
+            os.path.join(vault_path, *rel_path.split('/')): rel_path
+            for rel_path in current_manifest['notes'] if rel_path.endswith('.md')
+        }
         with ThreadPoolExecutor(max_workers=8) as executor:
-            futures = []
-            for subfolder_key, subfolder_data in processed_data.items():
-                vault_path = subfolder_data['vault_path']
-                for root, _, files in os.walk(vault_path):
-                    for file in files:
-                        if file.endswith('.md'):
-                            filepath = os.path.join(root, file)
-                            futures.append(executor.submit(read_note_content, filepath))
-            
-            for future in futures:
-                filepath, content = future.result()
-                note_content_cache[filepath] = content
+            for filepath, content in executor.map(read_note_content, carried_paths):
+                note_record = current_manifest['notes'][carried_paths[filepath]]
+                note_content_cache[filepath] = strip_foreign_links(strip_backlinks(content, note_record), note_record, filepath)
         
-        print(f"Cache built in {time.time() - start_time:.2f} seconds")
+        logger.info(f"Note content cache built in {time.time() - start_time:.2f} seconds")
+        run_report['stages']['note cache'] = time.perf_counter() - cache_start
     
     return note_content_cache.items()
 
@@ -415,28 +485,26 @@ def read_note_content(filepath):
         with open(filepath, 'r', encoding='utf-8') as f:
             return (filepath, f.read())
     except Exception as e:
-        print(f"Error reading {filepath}: {e}")
+        logger.warning(f"Error reading {filepath}: {e}")
         return (filepath, "")
 
-def process_normal_sheet(csv_data, sheet_index, subfolder_key, subfolder_data):
+def process_normal_sheet(sheet, sheet_index, subfolder_key, subfolder_data):
     """Process a sheet with proper sheet name identification"""
     # Get the actual sheet name from our configuration
     sheet_name = list(subfolders_dict[subfolder_key]['sheets'].keys())[sheet_index]
-    logger.info(f"Normal processing for sheet: {sheet_name}")
+    logger.debug(f"Normal processing for sheet: {sheet_name}")
     
     # SPECIAL CASE: History sheet - check directly by name
     if sheet_name == "History":
-        logger.info("Identified as History sheet - using special processor")
-        process_history_sheet(csv_data, subfolder_key, subfolder_data)
+        logger.debug("Identified as History sheet - using special processor")
+        process_history_sheet(sheet, subfolder_key, subfolder_data)
         return
     
     # Normal sheet processing
-    csv_data.seek(0)
-    reader = csv.reader(csv_data)
-    headers = [h.strip() for h in next(reader)]
+    headers = [h.strip() for h in sheet['headers']]
     
     folder_name = sanitize_value(headers[0]).replace(':', '_')
-    logger.info(f"Using folder name: {folder_name} for sheet: {sheet_name}")
+    logger.debug(f"Using folder name: {folder_name} for sheet: {sheet_name}")
     
     sheet_folder = os.path.join(subfolder_data['vault_path'], folder_name)
     os.makedirs(sheet_folder, exist_ok=True)
@@ -448,7 +516,27 @@ def process_normal_sheet(csv_data, sheet_index, subfolder_key, subfolder_data):
         'path': sheet_folder
     }
     
-    # Process headers
+    sanitized_headers = sanitize_headers(headers)
+    logger.debug(f"Sanitized headers: {sanitized_headers}")
+    
+    # Process rows
+    rows = []
+    for row_idx, row in enumerate(sheet['rows'], 1):
+        if not row:
+            logger.debug("Skipping empty row %s", row_idx)
+            continue
+        rows.append(row)
+    
+    rendered_rows = render_in_pool(
+        render_normal_rows, rows, sanitized_headers, folder_name, subfolder_key, sheet_folder, link_reference_index,
+        workers=render_workers
+    )
+    for row, rendered in zip(rows, rendered_rows):
+        process_normal_row(rendered, folder_name, subfolder_key)
+        record_link_dependents(row, sanitized_headers, rendered[0], rendered[1])
+
+def sanitize_headers(headers):
+    """Sanitize headers, numbering repeats (Name, Name_2, ...)"""
     header_count = {}
     sanitized_headers = []
     for header in headers:
@@ -459,17 +547,7 @@ def process_normal_sheet(csv_data, sheet_index, subfolder_key, subfolder_data):
         else:
             header_count[sanitized_header] = 1
             sanitized_headers.append(sanitized_header)
-    
-    logger.debug(f"Sanitized headers: {sanitized_headers}")
-    
-    # Process rows
-    csv_data.seek(0)
-    next(reader)  # Skip header
-    for row_idx, row in enumerate(reader, 1):
-        if not row:
-            logger.debug(f"Skipping empty row {row_idx}")
-            continue
-        process_normal_row(row, sanitized_headers, folder_name, subfolder_key, sheet_folder)
+    return sanitized_headers
 
 def process_history_year_entries(year_value, entries, headers, folder_name, subfolder_key, sheet_folder):
     """Process all entries for a year with verification"""
@@ -479,9 +557,9 @@ def process_history_year_entries(year_value, entries, headers, folder_name, subf
     filepath = os.path.join(sheet_folder, filename)
     
     # Verify we have all entries
-    print(f"Creating file for {year_value} with {len(entries)} entries")
+    logger.debug(f"Creating file for {year_value} with {len(entries)} entries")
     for i, entry in enumerate(entries, 1):
-        print(f"  Entry {i}: {entry['row'][0:3]}...")  # Print first few columns
+        logger.debug(f"  Entry {i}: {entry['row'][0:3]}...")  # Log first few columns
         
     # Prepare content
     front_matter = f"---\nYear: {year_value}\n---\n\n"
@@ -516,20 +594,17 @@ def process_history_year_entries(year_value, entries, headers, folder_name, subf
             for link in sorted(links):
                 md_file.write(f"{link}\n")
     
-    print(f"Successfully created file with {len(entries)} entries: {filepath}")
+    logger.debug(f"Successfully created file with {len(entries)} entries: {filepath}")
 
-def process_history_sheet(csv_data, subfolder_key, subfolder_data):
+def process_history_sheet(sheet, subfolder_key, subfolder_data):
     """Special processing for History sheet with detailed logging"""
-    logger.info("=== PROCESSING HISTORY SHEET ===")
+    logger.debug("=== PROCESSING HISTORY SHEET ===")
     
-    # Read ALL data at once
-    csv_data.seek(0)
-    all_rows = list(csv.reader(csv_data))
-    headers = [h.strip() for h in all_rows[0]]
-    data_rows = all_rows[1:]
+    headers = [h.strip() for h in sheet['headers']]
+    data_rows = sheet['rows']
     
-    logger.info(f"Found {len(data_rows)} total rows (excluding header)")
-    logger.info(f"Headers: {headers}")
+    logger.debug(f"Found {len(data_rows)} total rows (excluding header)")
+    logger.debug(f"Headers: {headers}")
 
     folder_name = "History"
     sheet_folder = os.path.join(subfolder_data['vault_path'], folder_name)
@@ -541,333 +616,1002 @@ def process_history_sheet(csv_data, subfolder_key, subfolder_data):
         'path': sheet_folder
     }
     
-    # Process headers
-    sanitized_headers = []
-    header_count = {}
-    for header in headers:
-        sanitized_header = sanitize_value(header)
-        if sanitized_header in header_count:
-            header_count[sanitized_header] += 1
-            sanitized_headers.append(f"{sanitized_header}_{header_count[sanitized_header]}")
-        else:
-            header_count[sanitized_header] = 1
-            sanitized_headers.append(sanitized_header)
-    
-    logger.info(f"Sanitized headers: {sanitized_headers}")
+    sanitized_headers = sanitize_headers(headers)
+    logger.debug(f"Sanitized headers: {sanitized_headers}")
     
     # Group rows by year
     year_entries = defaultdict(list)
     for row_idx, row in enumerate(data_rows, 1):
         if not row or not row[0].strip():
-            logger.warning(f"Skipping empty row {row_idx}")
+            logger.debug("Skipping empty row %s", row_idx)
             continue
             
         year_value = sanitize_value(row[0].strip())
         year_entries[year_value].append(row)
         if year_value not in processed_data[subfolder_key]['sheet_folders'][folder_name]['items']:
             processed_data[subfolder_key]['sheet_folders'][folder_name]['items'].append(year_value)
-        logger.debug(f"Row {row_idx} assigned to year: {year_value}")
+        logger.debug("Row %s assigned to year: %s", row_idx, year_value)
 
     # Log year distribution
-    logger.info(f"Year distribution: { {k: len(v) for k, v in year_entries.items()} }")
+    logger.debug(f"Year distribution: { {k: len(v) for k, v in year_entries.items()} }")
     
-    # Process each year
-    for year_value, entries in year_entries.items():
-        logger.info(f"Processing {len(entries)} entries for year: {year_value}")
-        
-        filename = f"{sanitize_filename(year_value.replace(':', '_'))}.md"
-        filepath = os.path.join(sheet_folder, filename)
-        
-        # Build content
-        content = f"---\nYear: {year_value}\n---\n\n## Historical Entries\n\n"
-        links = set()
-        
-        for entry_num, row in enumerate(entries, 1):
-            logger.debug(f"  Processing entry {entry_num} for {year_value}")
-            content += f"### Entry {entry_num}\n"
-            
-            for col_idx, value in enumerate(row):
-                if value and value.strip():
-                    header = sanitized_headers[col_idx]
-                    safe_value = sanitize_cell_value(value)
-                    content += f"- **{header}**: {safe_value}\n"
-                    
-                    # Log link processing
-                    if header != "Year":
-                        for ref in priority_link_references:
-                            if ref.endswith(safe_value.replace(':', '_')):
-                                logger.debug(f"    Found link: {ref}")
-                                links.add(f"[[{ref}]]")
-            
-            content += "\n"
-        
-        # Add links section
+    # Render every year, then stage the notes in order
+    rendered_years = render_in_pool(
+        render_history_years, list(year_entries.items()), sanitized_headers, folder_name, subfolder_key, sheet_folder,
+        priority_link_references, workers=render_workers, min_items=50
+    )
+    for year_value, filepath, content, reference, links in rendered_years:
+        logger.debug(f"Processing {len(year_entries[year_value])} entries for year: {year_value}")
         if links:
-            logger.info(f"  Found {len(links)} links for {year_value}")
-            content += "## Links\n"
-            for link in sorted(links):
-                content += f"{link}\n"
-        
-        # Write file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        logger.info(f"Created file: {filename} with {len(entries)} entries")
-
-def process_history_year(year_value, entries, headers, folder_name, subfolder_key, sheet_folder):
-    """Process all entries for a single year and combine them into one file"""
-    filename_value = sanitize_value(year_value).replace(':', '_')
-    base_filename = sanitize_filename(filename_value)
-    filename = f"{base_filename}.md"
-    filepath = os.path.join(sheet_folder, filename)
-    
-    # Prepare front matter with the year
-    front_matter = f"---\nYear: {year_value}\n---\n\n"
-    
-    # Prepare entries content
-    entries_content = "## Historical Entries\n\n"
-    links = set()
-    
-    # Process each entry
-    for entry_idx, row in enumerate(entries, 1):
-        entries_content += f"### Entry {entry_idx}\n"
-        
-        # Process each column in the row
-        for col_idx, value in enumerate(row):
-            if value and value.strip():
-                header = headers[col_idx]
-                sanitized_value = sanitize_cell_value(value)
-                entries_content += f"- **{header}**: {sanitized_value}\n"
-                
-                # Collect links (skip year column)
-                if header != "Year":
-                    for ref in priority_link_references:
-                        ref_name = ref.split('/')[-1]
-                        if ref_name.lower() in sanitized_value.lower():
-                            links.add(f"[[{ref}]]")
+            logger.debug(f"  Found {len(links)} links for {year_value}")
         
-        entries_content += "\n"
-    
-    # Write to file
-    with open(filepath, 'w', encoding='utf-8') as md_file:
-        md_file.write(front_matter)
-        md_file.write(entries_content)
+        stage_note(filepath, content, reference, links)
         
-        # Write links section if we have any
-        if links:
-            md_file.write("## Links\n")
-            for link in sorted(links):
-                md_file.write(f"{link}\n")
-    
-    print(f"Created History file for {year_value} with {len(entries)} entries: {filepath}")
+        logger.debug(f"Created file: {os.path.basename(filepath)} with {len(year_entries[year_value])} entries")
 
-def process_normal_row(row, sanitized_headers, folder_name, subfolder_key, sheet_folder):
-    filename_value = sanitize_value(row[0].strip())
-    if not filename_value:
-        filename_value = "Untitled"
-    filename_value = filename_value.replace(':', '_')
-    
-    filename_variants = get_apostrophe_variants(filename_value)
-    base_filename = sanitize_filename(filename_value)
-    filename = f"{base_filename}.md"
-    filepath = os.path.join(sheet_folder, filename)
+def process_normal_row(rendered, folder_name, subfolder_key):
+    filename_value, filepath, content, links = rendered
     
-    if filename not in link_dict:
-        link_dict[filename] = set()
-
     if filename_value:
         processed_data[subfolder_key]['sheet_folders'][folder_name]['items'].append(filename_value)
     
-    write_normal_markdown_file(row, sanitized_headers, filename_value, filename_variants, filepath, folder_name, subfolder_key)
-
-def write_normal_markdown_file(row, sanitized_headers, filename_value, filename_variants, filepath, folder_name, subfolder_key):
-    with open(filepath, 'w', encoding='utf-8') as md_file:
-        md_file.write("---\n")
-        for i, value in enumerate(row):
-            if value and value.strip():
-                safe_key = sanitized_headers[i]
-                safe_value = sanitize_cell_value(value)
-                
-                if 'description' in safe_key.lower() or 'note' in safe_key.lower():
-                    md_file.write(f"{safe_key}: |\n  {safe_value.replace('：', ':')}\n")
-                else:
-                    md_file.write(f"{safe_key}: {safe_value}\n")
-        md_file.write("---\n\n## Links\n")
-        
-        linked_values = set()
-        for i, value in enumerate(row):
-            if value and value.strip():
-                process_cell_for_links(value, filename_value, sanitized_headers[i], filename_variants, linked_values, folder_name, subfolder_key)
-        
-        for linked_value in sorted(linked_values):
-            md_file.write(f"- {linked_value}\n")
+    reference = f"{subfolder_key}/{folder_name}/{filename_value}"
+    stage_note(filepath, content, reference, links)
     
-    print(f"Created: {filepath}")
-
-def process_cell_for_links(value, filename_value, sanitized_header, filename_variants, linked_values, folder_name, subfolder_key):
-    sanitized_value = sanitize_value(value)
-    if sanitized_value == filename_value:
-        return  # Skip self-references
-        
-    for reference in priority_link_references:
-        reference_parts = reference.split("/")
-        reference_filename = reference_parts[-1]
-        
-        # Skip self-references
-        if reference == f"{subfolder_key}/{folder_name}/{filename_value}":
-            continue
-            
-        for variant in filename_variants:
-            if variant == reference_filename:
-                add_link(linked_values, reference)
-        
-        for variant in get_apostrophe_variants(sanitized_value):
-            if variant == reference_filename:
-                add_link(linked_values, reference)
-        
-        for variant in get_apostrophe_variants(sanitized_header):
-            if variant == reference_filename:
-                add_link(linked_values, reference)
-
-def add_link(linked_values, reference):
-    linked_values.add(f"[[{reference}]]")
-    link_dict[reference] = reference
+    logger.debug("Created: %s", filepath)
 
 def create_masterlists(subfolder_key):
     subfolder_data = processed_data[subfolder_key]
     masterlist_folder = os.path.join(subfolder_data['vault_path'], "Masterlists")
     os.makedirs(masterlist_folder, exist_ok=True)
     
-    for folder_name, folder_info in subfolder_data['sheet_folders'].items():
+    for folder_name, folder_info in subfolder_data.get('sheet_folders', {}).items():
         if folder_name.startswith("Keywords/"):
             continue
             
         safe_filename = sanitize_filename(folder_name)
         masterlist_file = os.path.join(masterlist_folder, f"{safe_filename}.md")
         
-        with open(masterlist_file, 'w', encoding='utf-8') as f:
-            f.write(f"# {folder_name} Masterlist\n\n")
-            for item in folder_info['items']:
-                link_text = f"{subfolder_key}/{folder_name}/{item.replace(':', '_')}"
-                f.write(f"- [[{link_text}]]\n")
-        
-        masterlist_filename = f"Masterlists/{safe_filename}.md"
-        if masterlist_filename not in link_dict:
-            link_dict[masterlist_filename] = set()
+        f = StringIO()
+        f.write(f"# {folder_name} Masterlist\n\n")
+        for item in folder_info['items']:
+            link_text = f"{subfolder_key}/{folder_name}/{item.replace(':', '_')}"
+            f.write(f"- [[{link_text}]]\n")
         
+        # Reverse links go to every note named like an item, including apostrophe variants
+        masterlist_links = set()
         for item in folder_info['items']:
             for variant in get_apostrophe_variants(item):
-                link_dict[masterlist_filename].add(f"{subfolder_key}/{folder_name}/{variant.replace(':', '_')}")
+                masterlist_links.add(f"{subfolder_key}/{folder_name}/{variant.replace(':', '_')}")
+        
+        stage_note(masterlist_file, f.getvalue(), f"{subfolder_key}/Masterlists/{safe_filename}", masterlist_links)
+
+def render_backlinks(content, backlinks):
+    """Render the reverse links appended to a note's Links section"""
+    # Keyword notes can hold thousands of links, so collect them once rather than search per backlink
+    present = set(re.findall(r"\[\[(.*?)\]\]", content)) if backlinks else ()
+    new_links = [link for link in sorted(backlinks) if link not in present]
+    if not new_links:
+        return ""
+    header = "" if "## Links" in content else "\n## Links\n"
+    return header + "".join(f"- [[{link}]]\n" for link in new_links)
+
+def strip_backlinks(content, note_record):
+    """
+    A note's content without the reverse links appended when it was written.
+    Only the block's length is kept in the manifest; a note edited since it
+    was written no longer matches its hash and is returned as it is.
+    """
+    size = note_record.get('backlinks_size', 0)
+    if size and hashlib.sha1(content.encode('utf-8')).hexdigest() == note_record['hash']:
+        return content[:-size]
+    return content
+
+def strip_foreign_links(content, note_record, filepath):
+    """
+    Drop a note's links to other games' notes, so keywords are matched the
+    same whichever of the other games' references were linkable when it was rendered.
+    """
+    own_prefix = convert_path_to_reference(filepath).split('/', 1)[0] + '/'
+    if all(link.startswith(own_prefix) for link in note_record.get('links', ())):
+        return content
+    return ''.join(
+        line for line in content.splitlines(keepends=True)
+        if not line.startswith('- [[') or line.startswith(f"- [[{own_prefix}")
+    )
+
+def reverse_links(notes):
+    """Note path -> references of the notes linking to it, from the notes' links"""
+    reference_paths = {note['reference']: rel_path for rel_path, note in notes.items() if note.get('reference')}
+    backlinks = defaultdict(set)
+    for rel_path, note in notes.items():
+        for link in note.get('links', ()):
+            target_path = reference_paths.get(link)
+            if target_path and target_path != rel_path:
+                backlinks[target_path].add(note['reference'])
+    return backlinks
 
 def update_reverse_links():
-    print("Updating reverse links...")
-    
-    for filename, links in link_dict.items():
-        for link in links:
-            linked_filename = link.split("/")[-1] + ".md"
-            if linked_filename in link_dict:
-                reverse_link = "/".join(link.split("/")[:-1] + [filename.replace(".md", "")])
-                link_dict[linked_filename].add(reverse_link)
-                print(f"Added reverse link: [[{reverse_link}]] to {linked_filename}")
-    
-    for filename, links in link_dict.items():
-        subfolder_key = None
-        filepath = None
-        for key, data in processed_data.items():
-            if filename.startswith(data['vault_path']):
-                subfolder_key = key
-                filepath = filename
-                break
-        
-        if not filepath or not subfolder_key:
-            print(f"Warning: Could not determine subfolder for file {filename}")
+    """Add reverse links from the in-memory link graph and write every note once"""
+    logger.debug("Updating reverse links...")
+    
+    notes = dict(current_manifest['notes'])
+    notes.update(pending_notes)
+    backlinks = reverse_links(notes)
+    # The manifest keeps only links; the reverse links the previous build wrote follow from its graph
+    previous_backlinks = reverse_links(previous_manifest['notes'])
+    
+    vault_writes = {}
+    for rel_path, note in pending_notes.items():
+        block = render_backlinks(note['content'], backlinks[rel_path])
+        queue_vault_file(vault_writes, rel_path, note, note['content'], block)
+    
+    # Carried-over notes only need rewriting when their reverse links changed
+    for rel_path, record in list(current_manifest['notes'].items()):
+        if rel_path in pending_notes or backlinks[rel_path] == previous_backlinks[rel_path]:
             continue
-            
-        if os.path.exists(filepath):
-            with open(filepath, 'r+', encoding='utf-8') as md_file:
-                content = md_file.read()
-                md_file.seek(0)
-                
-                if "## Links" not in content:
-                    md_file.seek(0, 2)
-                    md_file.write("\n## Links\n")
-                    for link in sorted(links):
-                        md_file.write(f"- [[{link}]]\n")
-                    print(f"Added '## Links' section to: {filepath}")
-                else:
-                    md_file.seek(0)
-                    lines = md_file.readlines()
-                    md_file.seek(0)
-                    md_file.truncate()
-                    
-                    links_section = False
-                    for line in lines:
-                        if line.strip() == "## Links":
-                            links_section = True
-                        md_file.write(line)
-                    
-                    if links_section:
-                        for link in sorted(links):
-                            if f"[[{link}]]" not in content:
-                                md_file.write(f"- [[{link}]]\n")
-                        print(f"Appended links to: {filepath}")
+        filepath = os.path.join(vault_path, *rel_path.split('/'))
+        _, content = read_note_content(filepath)
+        content = strip_backlinks(content, record)
+        block = render_backlinks(content, backlinks[rel_path])
+        queue_vault_file(vault_writes, rel_path, dict(record, filepath=filepath), content, block)
+    
+    with timed_stage('write'):
+        written = commit_vault_files(vault_path, vault_writes)
+    written_bytes.update(written)
+    run_report['files_written'] += len(written)
+    run_report['bytes_written'] += sum(written.values())
+    logger.info(f"Wrote {len(written)} files with reverse links")
+
+def queue_vault_file(vault_writes, rel_path, note, content, backlinks_block):
+    """Queue a note for the vault writer unless the previous build left identical content, and record it in the manifest"""
+    full_content = content + backlinks_block
+    content_hash = hashlib.sha1(full_content.encode('utf-8')).hexdigest()
+    current_manifest['notes'][rel_path] = {
+        'hash': content_hash,
+        'reference': note.get('reference'),
+        'links': sorted(note.get('links', ())),
+        'backlinks_size': len(backlinks_block),
+    }
+    
+    previous = previous_manifest['notes'].get(rel_path)
+    if previous and previous['hash'] == content_hash and os.path.exists(note['filepath']):
+        return
+    vault_writes[rel_path] = full_content
+
+def write_link_references(subfolder_key):
+    logger.debug("Writing link references to file...")
+    link_reference_file = os.path.join(processed_data[subfolder_key]['vault_path'], "link_references.txt")
+    f = StringIO()
+    f.write("Priority Link References:\n")
+    for reference in sorted(priority_link_references):
+        if reference.startswith(subfolder_key):
+            f.write(f"{reference}\n")
+    f.write("\nSecondary Link References:\n")
+    for reference in sorted(secondary_link_references):
+        if reference.startswith(subfolder_key):
+            f.write(f"{reference}\n")
+    stage_note(link_reference_file, f.getvalue())
+    logger.debug(f"Link references written to: {link_reference_file}")
+
+def vault_relative_path(filepath):
+    return os.path.relpath(filepath, vault_path).replace('\\', '/')
+
+def stage_note(filepath, content, reference=None, links=()):
+    """Queue a generated file; it is written once its reverse links are known"""
+    rel_path = vault_relative_path(filepath)
+    # A note rendered this run replaces any copy carried over from the last build
+    current_manifest['notes'].pop(rel_path, None)
+    pending_notes[rel_path] = {
+        'filepath': filepath,
+        'content': content,
+        'reference': reference,
+        'links': set(links),
+    }
+    written_notes.append(rel_path)
+
+# Modules whose code shapes the notes written; a change to any of them rebuilds every sheet
+rendering_modules = ("note_render.py", "markdown_sanitize.py", "text_linker.py", "sheet_diff.py")
+
+def script_hash():
+    digest = hashlib.sha1()
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    for path in (os.path.abspath(__file__), *(os.path.join(script_dir, name) for name in rendering_modules)):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def load_manifest():
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_manifest(previous=None):
+    """
+    Write the build manifest, unless it equals the previous one (previous, as
+    loaded). It is written to a temporary file and moved into place, so an
+    interrupted write never leaves a truncated manifest.
+    """
+    current_manifest['version'] = manifest_version
+    current_manifest['script_hash'] = script_hash()
+    if current_manifest == previous:
+        logger.info("Build manifest unchanged")
+        return
+    temp_file = f"{manifest_file}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(current_manifest, f, separators=(',', ':'))
+    os.replace(temp_file, manifest_file)
+    logger.info(f"Build manifest written to: {manifest_file}")
+
+def begin_sheet_build(subfolder_key):
+    sheet_dependents.clear()
+    return {
+        'notes_start': len(written_notes),
+        'references': set(priority_link_references),
+        'sheet_folders': dict(processed_data[subfolder_key].get('sheet_folders', {})),
+    }
+
+def record_sheet_build(sheet_key, subfolder_key, csv_hash, links_digest, build_state):
+    sheet_folders = processed_data[subfolder_key].get('sheet_folders', {})
+    notes = list(dict.fromkeys(written_notes[build_state['notes_start']:]))
+    note_indices = {rel_path: i for i, rel_path in enumerate(notes)}
+    current_manifest['sheets'][sheet_key] = {
+        'csv_hash': csv_hash,
+        'links_digest': format(links_digest, 'x'),
+        'references': sorted(priority_link_references - build_state['references']),
+        'sheet_folders': {
+            folder_name: folder_info for folder_name, folder_info in sheet_folders.items()
+            if build_state['sheet_folders'].get(folder_name) is not folder_info
+        },
+        'notes': notes,
+        # Link name key -> indices into notes
+        'dependents': {
+            key: sorted(note_indices[rel_path] for rel_path in rel_paths)
+            for key, rel_paths in sheet_dependents.items()
+        },
+    }
+
+def carry_over_sheet(sheet_key, subfolder_key):
+    """
+    Keep a sheet's references, masterlist items and notes from the previous
+    build, along with its manifest record, so a sheet that fails again next
+    run still owns its notes
+    """
+    previous = previous_manifest['sheets'].get(sheet_key)
+    if not previous:
+        return
+    current_manifest['sheets'][sheet_key] = previous
+    
+    for reference in previous['references']:
+        add_priority_link_reference(reference)
+    
+    sheet_folders = processed_data[subfolder_key].setdefault('sheet_folders', {})
+    sheet_folders.update(previous['sheet_folders'])
+    
+    for rel_path in previous['notes']:
+        if rel_path in pending_notes or rel_path in current_manifest['notes']:
+            continue
+        if rel_path in previous_manifest['notes']:
+            current_manifest['notes'][rel_path] = previous_manifest['notes'][rel_path]
+            written_notes.append(rel_path)
+
+def reuse_unchanged_sheet(sheet_key, sheet_name, subfolder_key, csv_hash):
+    """Skip a sheet whose CSV and visible link references match the previous build"""
+    previous = previous_manifest['sheets'].get(sheet_key)
+    if not previous or previous['csv_hash'] != csv_hash or sheet_name in get_keyword_sheets(subfolder_key):
+        return False
+    
+    # Notes already rendered by another sheet this run would be left stale
+    if any(rel_path in pending_notes or rel_path in current_manifest['notes'] for rel_path in previous['notes']):
+        return False
+    
+    for reference in previous['references']:
+        add_priority_link_reference(reference)
+    if format(link_references_digest, 'x') != previous['links_digest']:
+        return False
+    
+    keep_previous_sheet(sheet_key, subfolder_key)
+    return True
+
+def previous_visible_references(sheet_key):
+    """
+    References the previous build had created in sheet_key's game by the time
+    it rendered sheet_key, and those of the other games
+    """
+    game_prefix = sheet_key.split('/', 1)[0] + '/'
+    references = set(previous_foreign_references)
+    for key, record in previous_manifest['sheets'].items():
+        if key.startswith(game_prefix):
+            references.update(record['references'])
+        if key == sheet_key:
+            break
+    return references
+
+def relink_unchanged_sheet(sheet_key, sheet_name, subfolder_key, csv_hash, csv_data):
+    """
+    Update a sheet whose CSV is unchanged but whose visible link references
+    changed, e.g. because an entry of an earlier sheet was renamed.
+
+    The changed references are the difference between the references the
+    previous build saw at this sheet and the current ones. Only the notes the
+    sheet's dependency graph lists under their names are re-rendered; the rest
+    are kept from the previous build.
+
+    Returns:
+        int: Notes re-rendered, or None when the sheet needs a full build
+    """
+    previous = previous_manifest['sheets'].get(sheet_key)
+    if (not previous or previous['csv_hash'] != csv_hash or 'dependents' not in previous
+            or sheet_name in get_keyword_sheets(subfolder_key) or sheet_name == "History"):
+        return None
+    if any(rel_path in pending_notes or rel_path in current_manifest['notes'] for rel_path in previous['notes']):
+        return None
+    
+    for reference in previous['references']:
+        add_priority_link_reference(reference)
+    stale_notes = find_relink_notes(sheet_key, previous)
+    if stale_notes is None:
+        return None
+    
+    carry_over_sheet(sheet_key, subfolder_key)
+    current_manifest['sheets'][sheet_key] = dict(previous, links_digest=format(link_references_digest, 'x'))
+    if stale_notes:
+        rerender_notes(parse_sheet(csv_data), subfolder_key, stale_notes)
+    return len(stale_notes)
+
+def find_relink_notes(sheet_key, previous):
+    """
+    Notes of a previously built sheet that looked up a name whose references
+    changed since, or None when the previous build's references can't be
+    reconstructed from the manifest.
+    """
+    visible_references = previous_visible_references(sheet_key)
+    previous_digest = 0
+    for reference in visible_references:
+        previous_digest ^= reference_digest(reference)
+    if format(previous_digest, 'x') != previous['links_digest']:
+        return None
+    
+    current_references = priority_link_references | foreign_link_references
+    changed_keys = {link_name_key(reference.split('/')[-1]) for reference in visible_references ^ current_references}
+    return {previous['notes'][i] for key in changed_keys for i in previous['dependents'].get(key, ())}
+
+def update_changed_rows(sheet_key, sheet_name, subfolder_key, csv_hash, sheet):
+    """
+    Apply a changed sheet to the vault row by row, in watch mode.
+
+    Rows are diffed by key against the snapshot parsed when the sheet was last
+    built (see sheet_diff). Notes of added and modified rows are rendered, notes of removed rows are
+    left out of the build (and deleted as stale), and notes that looked up a
+    name whose references changed are re-rendered as in relink_unchanged_sheet.
+    Every other note is carried over. Runs after the sheet's link references
+    were created.
+
+    Returns:
+        int: Notes rendered, or None when the sheet needs a full build
+    """
+    previous = previous_manifest['sheets'].get(sheet_key)
+    snapshot = sheet_snapshots.get(sheet_key)
+    if (not previous or not snapshot or snapshot[0] != previous['csv_hash'] or 'dependents' not in previous
+            or sheet_name in get_keyword_sheets(subfolder_key) or sheet_name == "History"):
+        return None
+    previous_sheet = snapshot[1]
+    if previous_sheet['headers'] != sheet['headers']:
+        return None
+    if any(rel_path in pending_notes or rel_path in current_manifest['notes'] for rel_path in previous['notes']):
+        return None
+    stale_notes = find_relink_notes(sheet_key, previous)
+    if stale_notes is None:
+        return None
+    
+    headers = [h.strip() for h in sheet['headers']]
+    sanitized_headers = sanitize_headers(headers)
+    folder_name = sanitize_value(headers[0]).replace(':', '_')
+    sheet_folder = os.path.join(processed_data[subfolder_key]['vault_path'], folder_name)
+    
+    # Rows are keyed like their notes, by filename value
+    diff = diff_rows(
+        previous_sheet['headers'], previous_sheet['rows'], sheet['headers'], sheet['rows'],
+        key=lambda row: normal_row_filepath(row, sheet_folder)[0]
+    )
+    logger.debug(
+        "%s: %d rows added, %d modified, %d removed, %d duplicate keys", sheet_key,
+        len(diff['added']), len(diff['modified']), len(diff['removed']), len(diff['duplicate_keys'])
+    )
+    
+    rows = [row for row in sheet['rows'] if row]
+    row_paths = [normal_row_filepath(row, sheet_folder) for row in rows]
+    rel_paths = [vault_relative_path(filepath) for _, filepath in row_paths]
+    
+    # A note is rendered from every row sharing its path, so a removed row
+    # with a duplicate filename re-renders the rows left
+    changed_rows = [sheet['rows'][index] for index in diff['added']]
+    changed_rows.extend(sheet['rows'][new_index] for _, new_index, _ in diff['modified'])
+    changed_rows.extend(previous_sheet['rows'][index] for index in diff['removed'])
+    render_paths = stale_notes | {
+        vault_relative_path(normal_row_filepath(row, sheet_folder)[1]) for row in changed_rows
+    }
+    rendered_rows = iter(render_in_pool(
+        render_normal_rows, [row for row, rel_path in zip(rows, rel_paths) if rel_path in render_paths],
+        sanitized_headers, folder_name, subfolder_key, sheet_folder, link_reference_index, workers=render_workers
+    ))
+    
+    sheet_folders = processed_data[subfolder_key].setdefault('sheet_folders', {})
+    sheet_folders[folder_name] = {'items': [], 'path': sheet_folder}
+    for row, (filename_value, filepath), rel_path in zip(rows, row_paths, rel_paths):
+        if rel_path in render_paths:
+            process_normal_row(next(rendered_rows), folder_name, subfolder_key)
         else:
-            print(f"File not found: {filepath}")
+            sheet_folders[folder_name]['items'].append(filename_value)
+            current_manifest['notes'][rel_path] = previous_manifest['notes'][rel_path]
+            written_notes.append(rel_path)
+        record_link_dependents(row, sanitized_headers, filename_value, filepath)
+    return len(render_paths & set(rel_paths))
+
+def rerender_notes(sheet, subfolder_key, rel_paths, link_index=link_reference_index):
+    """Render again the rows of a normal sheet whose notes are in rel_paths, replacing the carried-over notes"""
+    headers = [h.strip() for h in sheet['headers']]
+    folder_name = sanitize_value(headers[0]).replace(':', '_')
+    sheet_folder = os.path.join(processed_data[subfolder_key]['vault_path'], folder_name)
+    
+    rows = [
+        row for row in sheet['rows']
+        if row and vault_relative_path(normal_row_filepath(row, sheet_folder)[1]) in rel_paths
+    ]
+    rendered_rows = render_in_pool(
+        render_normal_rows, rows, sanitize_headers(headers), folder_name, subfolder_key, sheet_folder,
+        link_index, workers=render_workers
+    )
+    for filename_value, filepath, content, links in rendered_rows:
+        stage_note(filepath, content, f"{subfolder_key}/{folder_name}/{filename_value}", links)
+        logger.debug("Re-rendered: %s", filepath)
+
+def keep_previous_sheet(sheet_key, subfolder_key):
+    """Restore a sheet's references, masterlist items and notes from the previous build as-is"""
+    carry_over_sheet(sheet_key, subfolder_key)
+
+def select_sheets_to_build(subfolder_key, refresh_only):
+    """Indices of the sheets this run downloads and builds; the rest are kept from the manifest"""
+    sheet_names = list(subfolders_dict[subfolder_key]['sheets'].keys())
+    return [
+        i for i, sheet_name in enumerate(sheet_names)
+        if not refresh_only
+        or f"{subfolder_key}/{sheet_name}" in refresh_only_sheets
+        or f"{subfolder_key}/{sheet_name}" not in previous_manifest['sheets']
+    ]
+
+def remove_stale_notes(full_rebuild):
+    """
+    Delete notes the previous build wrote and this one did not. A full rebuild
+    has no manifest to go by, so it prunes everything else in the subfolders,
+    after the new notes are in place rather than before the build.
+    """
+    if full_rebuild:
+        for subfolder_data in processed_data.values():
+            removed = prune_vault(subfolder_data['vault_path'], vault_path, current_manifest['notes'])
+            logger.info(f"Removed {len(removed)} files and folders no longer generated from {subfolder_data['vault_path']}")
+        return
+    
+    stale_paths = [
+        os.path.join(vault_path, *rel_path.split('/'))
+        for rel_path in previous_manifest['notes'] if rel_path not in current_manifest['notes']
+    ]
+    removed = delete_files(stale_paths)
+    logger.info(f"Removed {len(removed)} stale notes")
 
-def write_link_references():
-    print("Writing link references to file...")
+def download_all_sheets(subfolder_key, sheet_indices):
+    """Fetch the given sheets of a subfolder concurrently into the CSV cache and report timings"""
+    sheet_names = list(subfolders_dict[subfolder_key]['sheets'].keys())
+    csv_urls = [processed_data[subfolder_key]['csv_urls'][i] for i in sheet_indices]
+    start_time = time.time()
+    results, timings = fetch_all_csv(
+        csv_urls, csv_cache_dir, offline=offline_mode, max_workers=download_concurrency, return_text=False
+    )
+    
+    for i, csv_url in zip(sheet_indices, csv_urls):
+        sheet_name = sheet_names[i]
+        stats = timings[csv_url]
+        logger.debug(
+            f"Fetched {sheet_name}: {stats['status']} in {stats['seconds']:.2f}s, "
+            f"{stats['bytes']} bytes, {stats['attempts']} attempt(s)"
+        )
+        if isinstance(results[csv_url], Exception):
+            logger.warning(f"Could not download {sheet_name}: {results[csv_url]}")
+    
+    logger.info(f"Downloaded {len(csv_urls)} sheets in {time.time() - start_time:.2f} seconds")
+    return timings
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where the platform doesn't report it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+@contextmanager
+def timed_stage(stage, sheet_key=None):
+    """
+    Add the wall time of a pipeline stage to the run report, and to the sheet's
+    entry when given. The report also gets how far the stage raised the peak
+    memory of the process running it (0 when it stayed below an earlier peak).
+    """
+    start_time = time.perf_counter()
+    start_peak = peak_rss_mb()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start_time
+        run_report['stages'][stage] = run_report['stages'].get(stage, 0.0) + elapsed
+        if start_peak is not None:
+            stage_rss = run_report['stage_rss_mb']
+            stage_rss[stage] = stage_rss.get(stage, 0.0) + peak_rss_mb() - start_peak
+        if sheet_key:
+            sheet_stats = run_report['sheets'].setdefault(sheet_key, {'seconds': {}})
+            sheet_stats['seconds'][stage] = sheet_stats['seconds'].get(stage, 0.0) + elapsed
+
+def record_sheet_stats(sheet_key, status, sheet=None, build_state=None):
+    sheet_stats = run_report['sheets'].setdefault(sheet_key, {'seconds': {}})
+    sheet_stats['status'] = status
+    if sheet is not None:
+        notes = written_notes[build_state['notes_start']:]
+        busy = sum(sheet_stats['seconds'].get(stage, 0.0) for stage in ('parse', 'link references', 'render'))
+        sheet_stats['rows'] = len(sheet['rows'])
+        sheet_stats['rows_per_second'] = round(len(sheet['rows']) / busy, 1) if busy else None
+        sheet_stats['notes'] = len(notes)
+        sheet_stats['links'] = sum(len(pending_notes[rel_path]['links']) for rel_path in notes if rel_path in pending_notes)
+    sheet_stats['peak_rss_mb'] = peak_rss_mb()
+
+def log_sheet_summary(sheet_key):
+    """One progress line per built sheet, in place of a line per note"""
+    sheet_stats = run_report['sheets'][sheet_key]
+    seconds = sum(sheet_stats['seconds'].values())
+    logger.info(
+        f"Built {sheet_key}: {sheet_stats['rows']} rows, {sheet_stats['notes']} notes, "
+        f"{sheet_stats['links']} links in {seconds:.2f}s"
+    )
+
+def write_run_report(run_seconds):
+    """Finish the run report (bytes per sheet, totals) and write it as JSON next to the vault"""
+    for sheet_key, sheet_stats in run_report['sheets'].items():
+        sheet_notes = current_manifest['sheets'].get(sheet_key, {}).get('notes', [])
+        sheet_stats['bytes_written'] = sum(written_bytes.get(rel_path, 0) for rel_path in sheet_notes)
+        sheet_stats['seconds'] = {stage: round(seconds, 4) for stage, seconds in sheet_stats['seconds'].items()}
+    run_report['stages'] = {stage: round(seconds, 4) for stage, seconds in run_report['stages'].items()}
+    run_report['stage_rss_mb'] = {stage: round(growth, 1) for stage, growth in run_report['stage_rss_mb'].items()}
+    run_report['run_seconds'] = round(run_seconds, 4)
+    run_report['peak_rss_mb'] = peak_rss_mb()
+    run_report['finished'] = datetime.now().isoformat(timespec='seconds')
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(run_report, f, indent=2)
+    logger.info(f"Run report written to: {report_file}")
+
+def build_subfolder(subfolder_key, sheets_to_build, refresh_only):
+    """Build every sheet of one downloaded spreadsheet, reusing what the previous build allows"""
+    logger.info(f"Processing subfolder: {subfolder_key}")
+    subfolder_data = processed_data[subfolder_key]
+
+    logger.info("Step 2: Creating link references and notes...")
+    for i, csv_url in enumerate(subfolder_data['csv_urls']):
+        sheet_name = list(subfolders_dict[subfolder_key]['sheets'].keys())[i]
+        sheet_key = f"{subfolder_key}/{sheet_name}"
+        if i not in sheets_to_build:
+            logger.info(f"Sheet {sheet_name} not selected for refresh, keeping existing notes")
+            keep_previous_sheet(sheet_key, subfolder_key)
+            record_sheet_stats(sheet_key, 'kept')
+            continue
+        try:
+            logger.debug(f"Processing sheet {i + 1} ({sheet_name})...")
+            with timed_stage('download', sheet_key):
+                csv_data = download_csv(csv_url)
+            with csv_data:
+                csv_hash = hash_csv(csv_data)
+                if not refresh_only and reuse_unchanged_sheet(sheet_key, sheet_name, subfolder_key, csv_hash):
+                    logger.info(f"Sheet {sheet_name} unchanged, keeping existing notes")
+                    record_sheet_stats(sheet_key, 'reused')
+                    continue
+                if not refresh_only:
+                    with timed_stage('render', sheet_key):
+                        relinked = relink_unchanged_sheet(sheet_key, sheet_name, subfolder_key, csv_hash, csv_data)
+                    if relinked is not None:
+                        logger.info(f"Sheet {sheet_name} unchanged, re-rendered {relinked} notes linking to changed entries")
+                        record_sheet_stats(sheet_key, 'relinked')
+                        continue
+
+                build_state = begin_sheet_build(subfolder_key)
+                with timed_stage('parse', sheet_key):
+                    sheet = parse_sheet(csv_data)
+
+            with timed_stage('link references', sheet_key):
+                create_link_references(sheet, sheet_name, subfolder_key)
+            links_digest = link_references_digest
+            with timed_stage('render', sheet_key):
+                updated = update_changed_rows(sheet_key, sheet_name, subfolder_key, csv_hash, sheet)
+                if updated is None:
+                    process_csv(sheet, i, subfolder_key, get_keyword_sheets(subfolder_key))
+                else:
+                    logger.info(f"Sheet {sheet_name} changed, rendered {updated} notes of changed rows")
+            record_sheet_build(sheet_key, subfolder_key, csv_hash, links_digest, build_state)
+            if watch_mode:
+                sheet_snapshots[sheet_key] = (csv_hash, sheet)
+            record_sheet_stats(sheet_key, 'built', sheet, build_state)
+            log_sheet_summary(sheet_key)
+        except Exception as e:
+            logger.error(f"Error downloading or processing CSV for sheet {i + 1} ({sheet_name}): {e}")
+            carry_over_sheet(sheet_key, subfolder_key)
+            record_sheet_stats(sheet_key, 'failed')
+
+    logger.info("Step 3: Creating masterlists...")
+    with timed_stage('masterlists'):
+        create_masterlists(subfolder_key)
+    
+    logger.info("Step 4: Writing link references to file...")
+    write_link_references(subfolder_key)
+
+def build_game(subfolder_key, job, settings=None):
+    """
+    Build one game (spreadsheet) from scratch state, in a worker process or in this one.
+
+    Args:
+        subfolder_key (str): Game to build
+        job (dict): The game's part of the previous manifest, the sheets to build, the
+            other games' references now and in the previous build, and the cache keys
+            already validated this run
+        settings (dict): Module settings to apply first, in a worker process
+
+    Returns:
+        dict: The game's notes, manifest entries, references and report, for merge_game_build
+    """
+    if settings:
+        globals().update(settings)
+    reset_run_state()
+    previous_manifest.update(job['manifest'])
+    previous_foreign_references.update(job['previous_foreign'])
+    for reference in job['foreign']:
+        add_foreign_link_reference(reference)
+    validated_keys.update(job['validated_keys'])
+    try:
+        build_subfolder(subfolder_key, job['sheets_to_build'], job['refresh_only'])
+    finally:
+        if multiprocessing.parent_process() is not None:
+            shutdown_render_pool()
+    return {
+        'pending_notes': dict(pending_notes),
+        'notes': dict(current_manifest['notes']),
+        'sheets': dict(current_manifest['sheets']),
+        'written_notes': list(written_notes),
+        'references': set(priority_link_references),
+        'secondary_references': set(secondary_link_references),
+        'report_sheets': dict(run_report['sheets']),
+        'stages': dict(run_report['stages']),
+        'stage_rss_mb': dict(run_report['stage_rss_mb']),
+        'validated_keys': set(validated_keys),
+    }
+
+def game_manifest(manifest, subfolder_key):
+    """The sheets and notes of one game in a build manifest"""
+    folder_prefix = processed_data[subfolder_key]['folder_name'] + '/'
+    return {
+        'sheets': {key: record for key, record in manifest['sheets'].items() if key.startswith(f"{subfolder_key}/")},
+        'notes': {rel_path: record for rel_path, record in manifest['notes'].items() if rel_path.startswith(folder_prefix)},
+    }
+
+def collect_game_references(subfolder_key, sheets_to_build):
+    """
+    The references a game's build will create, read from its cached CSVs before
+    the games are built, so each game can link to the others from the start.
+    Sheets that are kept or can't be read keep their previous build's references.
+    """
+    references = set()
+    sheet_names = list(subfolders_dict[subfolder_key]['sheets'].keys())
+    for i, (sheet_name, csv_url) in enumerate(zip(sheet_names, processed_data[subfolder_key]['csv_urls'])):
+        if i in sheets_to_build:
+            try:
+                with download_csv(csv_url) as csv_data:
+                    sheet = parse_sheet(csv_data)
+                references.update(sheet_references(sheet, sheet_name, subfolder_key))
+                if sheet_name in get_keyword_sheets(subfolder_key):
+                    references.update(keyword_sheet_references(sheet, subfolder_key))
+                continue
+            except Exception as e:
+                logger.debug(f"Could not read references of {sheet_name} ahead of the build: {e}")
+        previous = previous_manifest['sheets'].get(f"{subfolder_key}/{sheet_name}")
+        if previous:
+            references.update(previous['references'])
+    return references
+
+def other_games_references(game_references, subfolder_key):
+    """The references of every game but subfolder_key, from a game -> references dict"""
+    return set().union(*(references for key, references in game_references.items() if key != subfolder_key))
+
+def build_games(refresh_only):
+    """
+    Download every game, then build them side by side in worker processes when
+    there are several, and merge their results into this process.
+
+    Returns:
+        tuple: (game -> its priority link references,
+        game -> the other games' references it was built with), for resolve_cross_game_links
+    """
+    manifest = {'sheets': dict(previous_manifest['sheets']), 'notes': dict(previous_manifest['notes'])}
+    games = list(processed_data)
+    
+    logger.info("Step 1: Downloading sheets...")
+    sheets_to_build = {}
+    with timed_stage('download'):
+        for subfolder_key in games:
+            sheets_to_build[subfolder_key] = select_sheets_to_build(subfolder_key, refresh_only)
+            download_all_sheets(subfolder_key, sheets_to_build[subfolder_key])
+    with timed_stage('link references'):
+        expected_references = {
+            subfolder_key: collect_game_references(subfolder_key, sheets_to_build[subfolder_key])
+            for subfolder_key in games
+        }
+    previous_references = defaultdict(set)
+    for sheet_key, record in manifest['sheets'].items():
+        previous_references[sheet_key.split('/', 1)[0]].update(record['references'])
+    
+    foreign_references = {
+        subfolder_key: other_games_references(expected_references, subfolder_key) for subfolder_key in games
+    }
+    jobs = [
+        {
+            'manifest': game_manifest(manifest, subfolder_key),
+            'sheets_to_build': sheets_to_build[subfolder_key],
+            'refresh_only': refresh_only,
+            'foreign': foreign_references[subfolder_key],
+            'previous_foreign': other_games_references(previous_references, subfolder_key),
+            'validated_keys': set(validated_keys),
+        }
+        for subfolder_key in games
+    ]
+    workers = min(game_workers, len(games))
+    
+    if workers > 1:
+        settings = {name: globals()[name] for name in game_worker_settings}
+        # Games share the cores, so each renders with its part of the render workers
+        settings['render_workers'] = max(1, render_workers // workers)
+        worker_queue, worker_listener = start_worker_logging()
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=log_to_queue, initargs=(worker_queue, log_level)) as executor:
+                results = list(executor.map(build_game, games, jobs, itertools.repeat(settings)))
+        finally:
+            stop_worker_logging(worker_listener)
+    else:
+        results = [build_game(subfolder_key, job) for subfolder_key, job in zip(games, jobs)]
+    
+    reset_run_state()
+    previous_manifest.update(manifest)
+    for result in results:
+        merge_game_build(result)
+    game_references = {subfolder_key: result['references'] for subfolder_key, result in zip(games, results)}
+    return game_references, foreign_references
+
+def merge_game_build(result):
+    pending_notes.update(result['pending_notes'])
+    current_manifest['notes'].update(result['notes'])
+    current_manifest['sheets'].update(result['sheets'])
+    written_notes.extend(result['written_notes'])
+    for reference in result['references']:
+        add_priority_link_reference(reference)
+    secondary_link_references.update(result['secondary_references'])
+    run_report['sheets'].update(result['report_sheets'])
+    for stage, seconds in result['stages'].items():
+        run_report['stages'][stage] = run_report['stages'].get(stage, 0.0) + seconds
+    # Game workers are separate processes, so what each added to its own peak adds up
+    for stage, growth in result['stage_rss_mb'].items():
+        run_report['stage_rss_mb'][stage] = run_report['stage_rss_mb'].get(stage, 0.0) + growth
+    validated_keys.update(result['validated_keys'])
+
+def resolve_cross_game_links(game_references, foreign_references):
+    """
+    Bring links between games up to date, once every game is built.
+
+    Each game was built linking to the references read ahead from the other
+    games' CSVs. Where a game ended up with other references (a sheet failed
+    and kept its previous build's, say), the notes that looked up a changed
+    name are rendered again, found through their sheet's dependency graph,
+    and the sheets' links digests are updated to match. History and keyword
+    sheets only link within their game.
+    """
+    relinked = 0
     for subfolder_key, subfolder_data in processed_data.items():
-        link_reference_file = os.path.join(subfolder_data['vault_path'], "link_references.txt")
-        with open(link_reference_file, 'w', encoding='utf-8') as f:
-            f.write("Priority Link References:\n")
-            for reference in sorted(priority_link_references):
-                if reference.startswith(subfolder_key):
-                    f.write(f"{reference}\n")
-            f.write("\nSecondary Link References:\n")
-            for reference in sorted(secondary_link_references):
-                if reference.startswith(subfolder_key):
-                    f.write(f"{reference}\n")
-        print(f"Link references written to: {link_reference_file}")
+        foreign = other_games_references(game_references, subfolder_key)
+        changed = foreign ^ foreign_references[subfolder_key]
+        if not changed:
+            continue
+        changed_keys = {link_name_key(reference.split('/')[-1]) for reference in changed}
+        changed_digest = 0
+        for reference in changed:
+            changed_digest ^= reference_digest(reference)
+        
+        # Other games' references, plus the game's own as each sheet saw them while the game was built
+        link_index = defaultdict(set)
+        for reference in foreign:
+            link_index[reference.split('/')[-1]].add(reference)
+        sheet_names = list(subfolders_dict[subfolder_key]['sheets'].keys())
+        for sheet_name, csv_url in zip(sheet_names, subfolder_data['csv_urls']):
+            sheet_key = f"{subfolder_key}/{sheet_name}"
+            record = current_manifest['sheets'].get(sheet_key)
+            if not record:
+                continue
+            for reference in record['references']:
+                link_index[reference.split('/')[-1]].add(reference)
+            current_manifest['sheets'][sheet_key] = dict(
+                record, links_digest=format(int(record['links_digest'], 16) ^ changed_digest, 'x')
+            )
+            rel_paths = {
+                record['notes'][i] for key, indices in record.get('dependents', {}).items() if key in changed_keys
+                for i in indices
+            }
+            if not rel_paths:
+                continue
+            
+            with download_csv(csv_url) as csv_data:
+                sheet = parse_sheet(csv_data)
+            rerender_notes(sheet, subfolder_key, rel_paths, link_index)
+            relinked += len(rel_paths)
+    logger.info(f"Re-rendered {relinked} notes whose links to other games changed during the build")
 
 def main():
     logger.info("=== SCRIPT STARTED ===")
     logger.info(f"Vault path: {vault_path}")
+    run_start = time.perf_counter()
     
     try:
-        for subfolder_key, subfolder_data in processed_data.items():
-            print(f"\nProcessing subfolder: {subfolder_key}")
-            
-            print("Step 0: Cleaning up the vault...")
-            cleanup_vault(subfolder_data['vault_path'])
-            
-            print("Step 1: Creating link references...")
-            for i, csv_url in enumerate(subfolder_data['csv_urls']):
-                try:
-                    sheet_name = list(subfolders_dict[subfolder_key]['sheets'].keys())[i]
-                    print(f"Processing sheet {i + 1} ({sheet_name})...")
-                    csv_data = download_csv(csv_url)
-                    create_link_references(csv_data, sheet_name, subfolder_key)
-                    process_csv(csv_data, i, subfolder_key, keyword_sheets)
-                except Exception as e:
-                    print(f"Error downloading or processing CSV for sheet {i + 1}: {e}")
-
-        print("\nStep 3: Creating masterlists...")
-        for subfolder_key in processed_data:
-            create_masterlists(subfolder_key)
-
-        print("Step 4: Updating reverse links...")
-        update_reverse_links()
+        manifest = load_manifest() if incremental_build else None
+        if manifest and manifest.get('version') != manifest_version:
+            manifest = None
+        if manifest:
+            logger.info("Incremental build against previous manifest")
+            previous_manifest['notes'] = manifest.get('notes', {})
+            # Rendering may have changed with the script, so only reuse sheets built by this version,
+            # unless a refresh of selected sheets explicitly keeps the others as they are
+            if manifest.get('script_hash') == script_hash() or refresh_only_sheets:
+                previous_manifest['sheets'] = manifest.get('sheets', {})
+        elif refresh_only_sheets:
+            logger.warning("No build manifest to restore other sheets from, rebuilding every sheet")
+        refresh_only = bool(manifest and refresh_only_sheets)
         
-        print("Step 5: Writing link references to file...")
-        write_link_references()
+        logger.info("Steps 1-4: Building each game's notes, masterlists and link references...")
+        with timed_stage('games'):
+            game_references, foreign_references = build_games(refresh_only)
         
-        print("Script completed successfully.")
-    
+        logger.info("Step 5: Resolving links between games...")
+        with timed_stage('cross-game links'):
+            resolve_cross_game_links(game_references, foreign_references)
+        
+        logger.info("Step 6: Updating reverse links and writing notes...")
+        with timed_stage('reverse links'):
+            update_reverse_links()
+        
+        logger.info("Step 7: Removing stale notes and saving build manifest...")
+        with timed_stage('manifest'):
+            remove_stale_notes(full_rebuild=not manifest)
+            save_manifest(manifest)
+        
+        write_run_report(time.perf_counter() - run_start)
         logger.info("Script completed successfully")
         
     except Exception as e:
         logger.error(f"Script failed: {str(e)}", exc_info=True)
         raise
+    finally:
+        shutdown_render_pool()
+        wait_for_deletes()
+        flush_logging()
+
+def reset_run_state():
+    """Clear everything one build collects, so main can run again in the same process"""
+    global link_references_digest
+    for state in (note_content_cache, keyword_note_index, pending_notes, written_notes, written_bytes,
+                  priority_link_references, secondary_link_references, link_reference_index, sheet_dependents,
+                  foreign_link_references, previous_foreign_references):
+        state.clear()
+    link_references_digest = 0
+    previous_manifest.clear()
+    previous_manifest.update(sheets={}, notes={})
+    current_manifest.clear()
+    current_manifest.update(sheets={}, notes={})
+    run_report.clear()
+    run_report.update(stages={}, stage_rss_mb={}, sheets={}, files_written=0, bytes_written=0)
+    for subfolder_data in processed_data.values():
+        subfolder_data.pop('sheet_folders', None)
+
+def snapshot_sheets():
+    """Parse the cached CSV of every built sheet not yet snapshotted, so its next change can be diffed by row"""
+    for subfolder_key, subfolder_data in processed_data.items():
+        sheet_names = list(subfolders_dict[subfolder_key]['sheets'].keys())
+        for sheet_name, csv_url in zip(sheet_names, subfolder_data['csv_urls']):
+            sheet_key = f"{subfolder_key}/{sheet_name}"
+            record = current_manifest['sheets'].get(sheet_key)
+            if not record or sheet_snapshots.get(sheet_key, (None,))[0] == record['csv_hash']:
+                continue
+            try:
+                with open(cached_csv_path(csv_url, csv_cache_dir), 'r', encoding='utf-8', newline='') as csv_data:
+                    csv_hash = hash_csv(csv_data)
+                    if csv_hash == record['csv_hash']:
+                        sheet_snapshots[sheet_key] = (csv_hash, parse_sheet(csv_data))
+            except OSError as e:
+                logger.debug("No snapshot of %s: %s", sheet_key, e)
+
+def cached_csv_hash(csv_url):
+    """Hash of a sheet's cached CSV, or None when it cannot be read"""
+    try:
+        with open(cached_csv_path(csv_url, csv_cache_dir), 'r', encoding='utf-8', newline='') as csv_data:
+            return hash_csv(csv_data)
+    except OSError as e:
+        logger.debug("Could not hash cached CSV for %s: %s", csv_url, e)
+        return None
+
+def poll_sheets():
+    """
+    Revalidate every sheet's cached CSV with a conditional request.
+
+    A sheet counts as changed only when its downloaded body hashes differently
+    from the CSV it was last built from, so a 200 carrying the same export
+    (a changed ETag, or a server without validators) does not trigger a rebuild.
+
+    Returns:
+        list: Keys of the sheets whose CSV content changed
+    """
+    validated_keys.clear()
+    changed = []
+    for subfolder_key, subfolder_data in processed_data.items():
+        sheet_names = list(subfolders_dict[subfolder_key]['sheets'].keys())
+        _, timings = fetch_all_csv(
+            subfolder_data['csv_urls'], csv_cache_dir, max_workers=download_concurrency, return_text=False
+        )
+        for sheet_name, csv_url in zip(sheet_names, subfolder_data['csv_urls']):
+            sheet_key = f"{subfolder_key}/{sheet_name}"
+            status = timings[csv_url]['status']
+            if status == 'downloaded':
+                record = current_manifest['sheets'].get(sheet_key)
+                if record and cached_csv_hash(csv_url) == record['csv_hash']:
+                    logger.debug(f"{sheet_key} was downloaded again with the same content")
+                    continue
+                changed.append(sheet_key)
+            elif status == 'failed':
+                logger.warning(f"Could not poll {sheet_key}, trying again next time")
+    return changed
+
+def watch():
+    """
+    Build the vault, then keep it in sync with the sheets until interrupted.
+
+    Unchanged sheets cost one 304 response per poll. When a sheet changed,
+    the build runs again: unchanged sheets are kept or relinked from the
+    manifest and changed sheets are diffed row by row against their snapshots.
+    """
+    global watch_mode
+    watch_mode = True
+    logger.info(f"Watching {sum(len(d['csv_urls']) for d in processed_data.values())} sheets every {watch_interval}s")
+    try:
+        rebuild = True
+        while True:
+            if rebuild:
+                reset_run_state()
+                try:
+                    main()
+                    rebuild = False
+                except Exception:
+                    logger.warning("Build failed, retrying after the next poll")
+                snapshot_sheets()
+            time.sleep(watch_interval)
+            changed = poll_sheets()
+            if changed:
+                logger.info(f"Changed sheets: {', '.join(changed)}")
+                rebuild = True
+    except KeyboardInterrupt:
+        logger.info("Watch stopped")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if watch_mode:
+        watch()
+    elif profile_run:
+        cProfile.run('main()', profile_file)
+        logger.info(f"Profile written to: {profile_file}")
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,76 @@
+import sys
+from array import array
+
+# Compact model of the notebook's sheets and entries, replacing the nested
+# dicts keyed by 'title', 'type', 'link', 'search_keys', 'references' and
+# 'content'. Entries are __slots__ objects numbered by the Vault that holds
+# them; references are stored as sorted arrays of entry ids rather than lists
+# of link strings, and the strings every entry repeats (column names, links,
+# search keys) are interned so equal values share one object.
+
+class Entry:
+    """
+    One note: a sheet row, or a whole sheet whose content maps row names to row entries.
+
+    Attributes:
+        id (int): Position in Vault.entries, -1 until the entry is added to a vault
+        title (str): Display title
+        type (str): 'row' or 'sheet'
+        link (str): Vault-relative note path without the .md extension
+        search_keys (tuple): Strings that make other entries reference this one
+        references (array): Sorted ids of the entries this one references
+        content (dict): Column -> value for a row, row name -> Entry for a sheet
+    """
+    __slots__ = ('id', 'title', 'type', 'link', 'search_keys', 'references', 'content')
+
+    def __init__(self, title, entry_type, link, search_keys, content):
+        self.id = -1
+        self.title = intern_text(title)
+        self.type = entry_type
+        self.link = intern_text(link)
+        self.search_keys = tuple(intern_text(key) for key in search_keys)
+        self.references = array('i')
+        self.content = content
+
+    def __repr__(self):
+        return f"Entry({self.type} {self.link!r}, {len(self.content)} fields, {len(self.references)} references)"
+
+class Vault:
+    """
+    Every entry of every game and meta category, numbered in the order they were added.
+
+    Attributes:
+        entries (list): Entry for each id
+        categories (dict): Category -> sheet name -> sheet Entry
+    """
+    __slots__ = ('entries', 'categories')
+
+    def __init__(self):
+        self.entries = []
+        self.categories = {}
+
+    def add_sheet(self, category, sheet_name, sheet):
+        """Number a sheet entry and the row entries in its content, and file it under its category"""
+        self.add_entry(sheet)
+        for row in sheet.content.values():
+            self.add_entry(row)
+        self.categories.setdefault(category, {})[sheet_name] = sheet
+
+    def add_entry(self, entry):
+        entry.id = len(self.entries)
+        self.entries.append(entry)
+
+    def reference_links(self, entry):
+        """Links of the entries referenced by entry, deduplicated and sorted"""
+        return sorted({self.entries[entry_id].link for entry_id in entry.references})
+
+    def items(self):
+        return self.categories.items()
+
+    def __repr__(self):
+        sheets = sum(len(sheets) for sheets in self.categories.values())
+        return f"Vault({len(self.categories)} categories, {sheets} sheets, {len(self.entries)} entries)"
+
+def intern_text(value):
+    """Intern strings so repeated values share one object; other values pass through"""
+    return sys.intern(value) if type(value) is str else value
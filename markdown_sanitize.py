@@ -0,0 +1,114 @@
+import re
+from functools import lru_cache
+
+# Sanitization shared by the scripts and the notebook. Character-level fixes
+# run as C-level str passes, patterns are compiled once at import, and values
+# that repeat across a build (headers, filenames, keys) are memoized.
+
+# Characters Obsidian treats as markup, escaped with a backslash. The backslash
+# comes first so the escapes added for the others are not doubled.
+MARKDOWN_ESCAPE_CHARS = ('\\', '#', '^', '|', '{', '}')
+
+# Characters not allowed in Windows filenames, replaced with underscores
+FILENAME_TABLE = str.maketrans({char: '_' for char in '\\/*?:"<>|'})
+
+SPRITE_TAG_PATTERN = re.compile(r'<sprite name=[^>]+>')
+WHITESPACE_RUN_PATTERN = re.compile(r'\s+')
+SINGLE_BRACKETS_PATTERN = re.compile(r'(?<!\\)\[([^\]]+)\]')
+
+INVALID_FILENAME_CHARS = r'[<>:"/\\|?*]'
+LEADING_INVALID_PATTERN = re.compile(r'^\s*(?:' + INVALID_FILENAME_CHARS + r'\s*)+')
+TRAILING_INVALID_PATTERN = re.compile(r'(?:\s*' + INVALID_FILENAME_CHARS + r')+\s*$')
+INNER_INVALID_PATTERN = re.compile(r'\s*(' + INVALID_FILENAME_CHARS + r')\s*')
+
+def escape_markdown(text):
+    for char in MARKDOWN_ESCAPE_CHARS:
+        if char in text:
+            text = text.replace(char, '\\' + char)
+    return text
+
+@lru_cache(maxsize=65536)
+def sanitize_value(value):
+    return escape_markdown(value.strip())
+
+@lru_cache(maxsize=65536)
+def sanitize_filename(filename):
+    return filename.translate(FILENAME_TABLE)
+
+def sanitize_cell_value(value):
+    if not value:
+        return ""
+    value = ' '.join(value.splitlines())
+    if ':' in value:
+        value = value.replace(': ', '：')
+    return value.strip()
+
+def clean_square_brackets(text):
+    """
+    Escape single square brackets in the text to prevent them from being treated as links in Markdown.
+
+    Args:
+        text (str): The input text containing square brackets.
+
+    Returns:
+        str: The text with escaped square brackets.
+    """
+    if '[' not in text:
+        return text
+    return SINGLE_BRACKETS_PATTERN.sub(r'\\[\1\\]', text)
+
+def clean_sprite_tags(text):
+    """
+    Remove <sprite name=...> tags from the text and ensure no double spaces.
+
+    Args:
+        text (str): The input text.
+
+    Returns:
+        str: The cleaned text.
+    """
+    if '<sprite name=' in text:
+        text = SPRITE_TAG_PATTERN.sub('', text)
+    return WHITESPACE_RUN_PATTERN.sub(' ', text).strip()
+
+def clean_sprite_tags_and_brackets(text):
+    """
+    Remove <sprite name=...> tags and escape square brackets in the text.
+
+    Args:
+        text (str): The input text.
+
+    Returns:
+        str: The cleaned text.
+    """
+    return clean_square_brackets(clean_sprite_tags(text))
+
+def remove_empty_lines(s):
+    """
+    Remove all literal '/n' substrings and leading spaces from each line,
+    and remove any empty (or whitespace-only) lines from the input string.
+
+    Args:
+        s (str): The input string.
+
+    Returns:
+        str: The cleaned string.
+    """
+    s = s.replace("/n", "")
+    return "\n".join([line.lstrip() for line in s.splitlines() if line.strip()])
+
+@lru_cache(maxsize=65536)
+def clean_filename(filename):
+    """
+    Cleans a filename by removing disallowed Windows characters and replacing them with underscores.
+
+    Args:
+        filename (str): The original filename string.
+
+    Returns:
+        str: The cleaned filename.
+    """
+    filename = LEADING_INVALID_PATTERN.sub('', filename)
+    filename = TRAILING_INVALID_PATTERN.sub('', filename)
+    filename = INNER_INVALID_PATTERN.sub('_', filename)
+    return remove_empty_lines(filename)
@@ -0,0 +1,245 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from markdown_sanitize import sanitize_value, sanitize_filename, sanitize_cell_value
+from text_linker import build_linker, find_names
+
+# Rendering turns parsed rows into note text without touching the pipeline's
+# global state, so large sheets can be sharded across worker processes. This
+# module has no import-time side effects, which keeps spawned workers cheap.
+
+# Shared worker pool, created on first use
+render_pool = None
+
+@lru_cache(maxsize=65536)
+def get_apostrophe_variants(text):
+    """Spellings of text with and without apostrophes and plural s, computed once per distinct text"""
+    variants = {text}
+
+    if "'" in text:
+        variants.add(text.replace("'", ""))
+        variants.add(text.replace("'", " "))
+
+    if text.endswith("'s"):
+        base = text[:-2]
+        variants.update({
+            base,
+            base + "s",
+            base + "'",
+            base + "s'"
+        })
+    elif text.endswith("s'"):
+        base = text[:-1]
+        variants.update({
+            base,
+            base + "s",
+            base + "'s",
+            base[:-1]
+        })
+    elif text.endswith("s"):
+        variants.update({
+            text + "'",
+            text + "'s",
+            text[:-1] + "'",
+            text[:-1] + "'s"
+        })
+
+    return frozenset(variants)
+
+def resolve_variant_references(text, link_index, resolved):
+    """
+    References whose filename is an apostrophe variant of text.
+
+    resolved memoizes the answer per text for one render batch, during which
+    link_index does not change, so repeated headers, filenames and values
+    cost a single dictionary hit.
+    """
+    references = resolved.get(text)
+    if references is None:
+        references = set()
+        for variant in get_apostrophe_variants(text):
+            references.update(link_index.get(variant, ()))
+        resolved[text] = references
+    return references
+
+def render_normal_rows(rows, sanitized_headers, folder_name, subfolder_key, sheet_folder, link_index):
+    """
+    Render the notes for a batch of rows of a normal sheet.
+
+    Args:
+        rows (list): Non-empty CSV rows
+        sanitized_headers (list): Header of every column, deduplicated
+        folder_name (str): Sheet folder, also the middle segment of references
+        subfolder_key (str): Subfolder the sheet belongs to
+        sheet_folder (str): Directory the notes are written to
+        link_index (dict): Reference filename -> full references, as of this sheet
+
+    Returns:
+        list: (filename_value, filepath, content, links) for every row, in row order
+    """
+    resolved = {}
+    return [
+        render_normal_row(row, sanitized_headers, folder_name, subfolder_key, sheet_folder, link_index, resolved)
+        for row in rows
+    ]
+
+def normal_row_filepath(row, sheet_folder):
+    """The filename value (also the reference's last segment) and note path of a normal sheet row"""
+    filename_value = sanitize_value(row[0].strip())
+    if not filename_value:
+        filename_value = "Untitled"
+    filename_value = filename_value.replace(':', '_')
+
+    base_filename = sanitize_filename(filename_value)
+    filename = f"{base_filename}.md"
+    return filename_value, os.path.join(sheet_folder, filename)
+
+def render_normal_row(row, sanitized_headers, folder_name, subfolder_key, sheet_folder, link_index, resolved):
+    filename_value, filepath = normal_row_filepath(row, sheet_folder)
+
+    content, linked_values = render_normal_markdown(row, sanitized_headers, filename_value, folder_name, subfolder_key, link_index, resolved)
+    return filename_value, filepath, content, sorted(link[2:-2] for link in linked_values)
+
+def render_normal_markdown(row, sanitized_headers, filename_value, folder_name, subfolder_key, link_index, resolved):
+    parts = ["---\n"]
+    for i, value in enumerate(row):
+        if value and value.strip():
+            safe_key = sanitized_headers[i]
+            safe_value = sanitize_cell_value(value)
+
+            if 'description' in safe_key.lower() or 'note' in safe_key.lower():
+                parts.append(f"{safe_key}: |\n  {safe_value.replace('：', ':')}\n")
+            else:
+                parts.append(f"{safe_key}: {safe_value}\n")
+    parts.append("---\n\n## Links\n")
+
+    linked_values = set()
+    for i, value in enumerate(row):
+        if value and value.strip():
+            process_cell_for_links(value, filename_value, sanitized_headers[i], linked_values, folder_name, subfolder_key, link_index, resolved)
+
+    for linked_value in sorted(linked_values):
+        parts.append(f"- {linked_value}\n")
+    return ''.join(parts), linked_values
+
+def process_cell_for_links(value, filename_value, sanitized_header, linked_values, folder_name, subfolder_key, link_index, resolved):
+    sanitized_value = sanitize_value(value)
+    if sanitized_value == filename_value:
+        return  # Skip self-references
+
+    self_reference = f"{subfolder_key}/{folder_name}/{filename_value}"
+
+    for text in (filename_value, sanitized_value, sanitized_header):
+        for reference in resolve_variant_references(text, link_index, resolved):
+            # Skip self-references
+            if reference != self_reference:
+                add_link(linked_values, reference)
+
+def row_link_texts(row, sanitized_headers, filename_value):
+    """Every text a row's links are looked up under, as in process_cell_for_links"""
+    texts = {filename_value}
+    for i, value in enumerate(row):
+        if value and value.strip():
+            sanitized_value = sanitize_value(value)
+            if sanitized_value != filename_value:
+                texts.add(sanitized_value)
+                texts.add(sanitized_headers[i])
+    return texts
+
+def add_link(linked_values, reference):
+    linked_values.add(f"[[{reference}]]")
+
+def render_history_years(year_groups, sanitized_headers, folder_name, subfolder_key, sheet_folder, references):
+    """
+    Render one History note per year.
+
+    Args:
+        year_groups (list): (year_value, rows) pairs, in sheet order
+        sanitized_headers (list): Header of every column, deduplicated
+        folder_name (str): History folder name
+        subfolder_key (str): Subfolder the sheet belongs to
+        sheet_folder (str): Directory the notes are written to
+        references (set): Priority link references, as of this sheet
+
+    Returns:
+        list: (year_value, filepath, content, reference, links) for every year, in order
+    """
+    # Reference names are found in the entries' prose with one linker, built once per batch
+    references_by_name = {}
+    for reference in references:
+        references_by_name.setdefault(reference.split('/')[-1], []).append(reference)
+    linker = build_linker(references_by_name, ignore_case=True)
+    return [
+        render_history_year(year_value, entries, sanitized_headers, folder_name, subfolder_key, sheet_folder, linker, references_by_name)
+        for year_value, entries in year_groups
+    ]
+
+def render_history_year(year_value, entries, sanitized_headers, folder_name, subfolder_key, sheet_folder, linker, references_by_name):
+    filename = f"{sanitize_filename(year_value.replace(':', '_'))}.md"
+    filepath = os.path.join(sheet_folder, filename)
+
+    parts = [f"---\nYear: {year_value}\n---\n\n## Historical Entries\n\n"]
+    links = set()
+
+    for entry_num, row in enumerate(entries, 1):
+        parts.append(f"### Entry {entry_num}\n")
+
+        for col_idx, value in enumerate(row):
+            if value and value.strip():
+                header = sanitized_headers[col_idx]
+                safe_value = sanitize_cell_value(value)
+                parts.append(f"- **{header}**: {safe_value}\n")
+
+                if header != "Year":
+                    for name in find_names(safe_value.replace(':', '_'), linker):
+                        for ref in references_by_name[name]:
+                            links.add(f"[[{ref}]]")
+
+        parts.append("\n")
+
+    if links:
+        parts.append("## Links\n")
+        for link in sorted(links):
+            parts.append(f"{link}\n")
+
+    reference = f"{subfolder_key}/{folder_name}/{sanitize_value(year_value).replace(':', '_')}"
+    return year_value, filepath, ''.join(parts), reference, sorted(link[2:-2] for link in links)
+
+def render_in_pool(render_batch, items, *args, workers=1, min_items=200):
+    """
+    Run render_batch(items, *args), sharding large batches across the render pool.
+
+    Shards are contiguous and results are concatenated in submission order, so
+    the output is identical to rendering serially in the calling process.
+
+    Args:
+        render_batch (callable): Module-level render function taking a list of items
+        items (list): Items to render
+        workers (int): Worker processes; 1 renders in the calling process
+        min_items (int): Smallest batch worth sending to the pool
+
+    Returns:
+        list: Rendered results, one per item, in order
+    """
+    global render_pool
+    if workers <= 1 or len(items) < min_items:
+        return render_batch(items, *args)
+
+    if render_pool is None:
+        render_pool = ProcessPoolExecutor(max_workers=workers)
+
+    shard_size = -(-len(items) // workers)
+    futures = [
+        render_pool.submit(render_batch, items[start:start + shard_size], *args)
+        for start in range(0, len(items), shard_size)
+    ]
+    rendered = []
+    for future in futures:
+        rendered.extend(future.result())
+    return rendered
+
+def shutdown_render_pool():
+    global render_pool
+    if render_pool is not None:
+        render_pool.shutdown()
+        render_pool = None
@@ -0,0 +1,138 @@
+import atexit
+import logging
+import multiprocessing
+import queue
+import sys
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+
+# Logging shared by the scripts and the notebook. Records are put on a queue
+# and written by a listener thread, so per-note messages cost a queue put on
+# the hot path instead of a console or file write. The file handler is also
+# buffered; the console shows each record as soon as the listener reaches it,
+# so progress lines appear while a build or watch loop runs.
+#
+# Levels: per-row and per-link detail is DEBUG, per-sheet progress summaries
+# are INFO, skipped or failed sheets are WARNING/ERROR. Messages logged inside
+# per-row loops pass their values as arguments (logger.debug("%s", value)) so
+# nothing is formatted unless the level is enabled. Quiet mode keeps the
+# console to warnings and errors; the log file still gets everything at level.
+#
+# Worker processes log onto a multiprocessing queue (start_worker_logging,
+# log_to_queue), which is forwarded into the parent's logging above.
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+CONSOLE_FORMAT = '%(message)s'
+
+# Records buffered by the file handler before a flush; errors flush immediately
+BUFFER_CAPACITY = 512
+
+# Listener draining the queue, started by setup_logging
+log_listener = None
+
+def setup_logging(log_file=None, level=logging.INFO, quiet=False, console=True):
+    """
+    Route the root logger through a queue to the console and, optionally, a log file.
+
+    Calling it again replaces the previous configuration, so a notebook cell
+    can be re-run to switch levels or quiet mode.
+
+    Args:
+        log_file (str): File the log is written to (overwritten), or None
+        level (int): Lowest level recorded, e.g. logging.DEBUG for per-note detail
+        quiet (bool): Show only warnings and errors on the console
+        console (bool): Also log to stdout
+
+    Returns:
+        logging.Logger: The root logger
+    """
+    global log_listener
+    stop_logging()
+
+    handlers = []
+    if log_file:
+        file_handler = logging.FileHandler(log_file, mode='w', encoding='utf-8')
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(buffered(file_handler, level))
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        console_handler.setLevel(logging.WARNING if quiet else level)
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    log_listener.start()
+
+    logger = logging.getLogger()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(level)
+    return logger
+
+def buffered(handler, level):
+    """Wrap handler so records are written in batches, flushing at once on errors"""
+    memory_handler = MemoryHandler(BUFFER_CAPACITY, flushLevel=logging.ERROR, target=handler)
+    memory_handler.setLevel(level)
+    return memory_handler
+
+def flush_logging():
+    """Write out every queued and buffered record, e.g. before a long pause or a crash report"""
+    if log_listener is None:
+        return
+    log_listener.stop()
+    for handler in log_listener.handlers:
+        handler.flush()
+    log_listener.start()
+
+def stop_logging():
+    """Drain the queue, flush and close the handlers"""
+    global log_listener
+    if log_listener is None:
+        return
+    log_listener.stop()
+    for handler in log_listener.handlers:
+        target = getattr(handler, 'target', None)
+        handler.close()
+        if target is not None:
+            target.close()
+    log_listener = None
+
+class ForwardHandler(logging.Handler):
+    """Hand records received from worker processes to this process's loggers"""
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+def start_worker_logging():
+    """
+    Forward log records from worker processes into this process's logging.
+
+    Returns:
+        tuple: (queue to pass to log_to_queue in each worker, listener for stop_worker_logging)
+    """
+    worker_queue = multiprocessing.Queue()
+    listener = QueueListener(worker_queue, ForwardHandler())
+    listener.start()
+    return worker_queue, listener
+
+def stop_worker_logging(listener):
+    """Forward the records still queued by workers, then stop forwarding"""
+    listener.stop()
+
+def log_to_queue(worker_queue, level=logging.INFO):
+    """
+    Send this worker process's log records to the queue from start_worker_logging.
+
+    Meant as a process pool initializer. A forked worker inherits the parent's
+    handlers and listener but not the listener's thread, so they are dropped.
+    """
+    global log_listener
+    log_listener = None
+    logger = logging.getLogger()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(QueueHandler(worker_queue))
+    logger.setLevel(level)
+
+atexit.register(stop_logging)
@@ -0,0 +1,163 @@
+from collections import defaultdict
+
+# Row-level diff between two exports of the same sheet. Rows are keyed by
+# their first-column value, as notes are named after it, and the diff says
+# which rows were added, removed or modified, with a bitmask of the columns
+# that changed. Columns are matched by header, so reordered or inserted
+# columns don't mark every row modified. A row that held a value in a removed
+# column has no new column to flag, so it is marked modified in every column.
+#
+# Duplicate keys (the first-column duplicates check_first_row_and_column_duplicates
+# reports in the notebook) are allowed: rows sharing a key are first paired
+# with identical rows, then in order of appearance, and any left over are
+# added or removed.
+
+def first_column_key(row):
+    return row[0].strip() if row else ""
+
+def diff_rows(old_headers, old_rows, new_headers, new_rows, key=first_column_key):
+    """
+    Diff two snapshots of a sheet row by row.
+
+    Empty rows are ignored, and a short row reads as empty in its missing columns.
+
+    Args:
+        old_headers (list): Header row of the previous snapshot
+        old_rows (list): Data rows of the previous snapshot
+        new_headers (list): Header row of the new snapshot
+        new_rows (list): Data rows of the new snapshot
+        key (callable): Row -> key the rows are matched by
+
+    Returns:
+        dict: {
+            'added': list,          # Indices into new_rows
+            'removed': list,        # Indices into old_rows
+            'modified': list,       # (old index, new index, mask) where bit i of
+                                    # mask is set when column i of new_headers changed
+                                    # (every bit when a removed column held a value)
+            'unchanged': list,      # (old index, new index)
+            'duplicate_keys': list, # Keys held by more than one row in either snapshot
+            'headers_changed': bool
+        }
+    """
+    column_map = map_columns(old_headers, new_headers)
+    headers_changed = list(old_headers) != list(new_headers)
+    mapped_columns = set(column_map)
+    removed_columns = [index for index in range(len(old_headers)) if index not in mapped_columns]
+
+    old_groups = group_rows(old_rows, key)
+    new_groups = group_rows(new_rows, key)
+
+    diff = {
+        'added': [],
+        'removed': [],
+        'modified': [],
+        'unchanged': [],
+        'duplicate_keys': [],
+        'headers_changed': headers_changed,
+    }
+    for row_key in old_groups.keys() | new_groups.keys():
+        old_indices = old_groups.get(row_key, [])
+        new_indices = new_groups.get(row_key, [])
+        if len(old_indices) > 1 or len(new_indices) > 1:
+            diff['duplicate_keys'].append(row_key)
+
+        pairs = pair_rows(old_rows, old_indices, new_rows, new_indices)
+        for old_index, new_index in pairs:
+            mask = change_mask(
+                old_rows[old_index], new_rows[new_index], column_map, headers_changed, removed_columns
+            )
+            if mask:
+                diff['modified'].append((old_index, new_index, mask))
+            else:
+                diff['unchanged'].append((old_index, new_index))
+        if len(pairs) < len(old_indices):
+            paired = {old_index for old_index, _ in pairs}
+            diff['removed'].extend(old_index for old_index in old_indices if old_index not in paired)
+        if len(pairs) < len(new_indices):
+            paired = {new_index for _, new_index in pairs}
+            diff['added'].extend(new_index for new_index in new_indices if new_index not in paired)
+
+    diff['added'].sort()
+    diff['removed'].sort()
+    diff['modified'].sort(key=lambda change: change[1])
+    diff['unchanged'].sort(key=lambda pair: pair[1])
+    diff['duplicate_keys'].sort()
+    return diff
+
+def group_rows(rows, key):
+    """Key -> indices of the non-empty rows with that key, in order"""
+    groups = defaultdict(list)
+    for index, row in enumerate(rows):
+        if row:
+            groups[key(row)].append(index)
+    return groups
+
+def pair_rows(old_rows, old_indices, new_rows, new_indices):
+    """
+    Pair the old and new rows of one key: identical rows first, then the rest in order.
+
+    Returns:
+        list: (old index, new index) pairs
+    """
+    if not old_indices or not new_indices or len(old_indices) == len(new_indices) == 1:
+        return list(zip(old_indices, new_indices))
+
+    by_content = defaultdict(list)
+    for old_index in old_indices:
+        by_content[tuple(old_rows[old_index])].append(old_index)
+    pairs = []
+    unpaired_new = []
+    for new_index in new_indices:
+        matches = by_content.get(tuple(new_rows[new_index]))
+        if matches:
+            pairs.append((matches.pop(0), new_index))
+        else:
+            unpaired_new.append(new_index)
+    paired_old = {old_index for old_index, _ in pairs}
+    unpaired_old = [old_index for old_index in old_indices if old_index not in paired_old]
+    pairs.extend(zip(unpaired_old, unpaired_new))
+    return pairs
+
+def map_columns(old_headers, new_headers):
+    """
+    For each new column, the index of the old column with the same header, or None.
+
+    Repeated headers are matched in order of appearance.
+    """
+    old_positions = defaultdict(list)
+    for index, header in enumerate(old_headers):
+        old_positions[header.strip()].append(index)
+    return [
+        old_positions[header.strip()].pop(0) if old_positions.get(header.strip()) else None
+        for header in new_headers
+    ]
+
+def cell(row, index):
+    return row[index] if index is not None and index < len(row) else ""
+
+def change_mask(old_row, new_row, column_map, headers_changed, removed_columns=()):
+    """
+    Bitmask of the new columns whose value differs from the old row's.
+
+    A value in one of removed_columns (old columns with no new counterpart)
+    sets every column's bit, as the row's note loses that value wherever it was rendered.
+    """
+    if not headers_changed and old_row == new_row:
+        return 0
+    if any(cell(old_row, index) for index in removed_columns):
+        return (1 << len(column_map)) - 1 or 1
+    mask = 0
+    for new_index, old_index in enumerate(column_map):
+        if cell(new_row, new_index) != cell(old_row, old_index):
+            mask |= 1 << new_index
+    # Values in columns beyond the header row are not matched by header
+    if not headers_changed:
+        for index in range(len(column_map), max(len(old_row), len(new_row))):
+            if cell(new_row, index) != cell(old_row, index):
+                mask |= 1 << index
+    return mask
+
+def changed_columns(mask):
+    """Column indices set in a change mask"""
+    return [index for index in range(mask.bit_length()) if mask >> index & 1]
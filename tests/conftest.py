@@ -0,0 +1,35 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The pipeline scripts live at the repository root and are imported as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# csv_to_markdown_dev creates its vault folders and log file on import
+os.environ.setdefault("OBSIDIAN_VAULT_PATH", tempfile.mkdtemp(prefix="obsidian_test_vault_"))
+
+@pytest.fixture
+def dev(tmp_path, monkeypatch):
+    """csv_to_markdown_dev building Book of Hours offline, from tmp_path/cache into tmp_path/vault"""
+    import csv_to_markdown_dev as dev
+
+    game = "Book of Hours"
+    vault = tmp_path / "vault"
+    subfolder_data = dict(dev.processed_data[game], vault_path=str(vault / game))
+    os.makedirs(subfolder_data['vault_path'])
+    monkeypatch.setattr(dev, 'processed_data', {game: subfolder_data})
+    monkeypatch.setattr(dev, 'vault_path', str(vault))
+    monkeypatch.setattr(dev, 'manifest_file', str(vault / "obsidian_import_manifest.json"))
+    monkeypatch.setattr(dev, 'report_file', str(vault / "obsidian_import_report.json"))
+    monkeypatch.setattr(dev, 'csv_cache_dir', str(tmp_path / "cache"))
+    monkeypatch.setattr(dev, 'offline_mode', True)
+    monkeypatch.setattr(dev, 'game_workers', 1)
+    monkeypatch.setattr(dev, 'render_workers', 1)
+    dev.validated_keys.clear()
+    dev.reset_run_state()
+    yield dev
+    dev.reset_run_state()
+    dev.sheet_snapshots.clear()
+    dev.validated_keys.clear()
@@ -0,0 +1,177 @@
+import csv
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import csv_fetch_cache
+from csv_fetch_cache import cache_paths, fetch_all_csv, fetch_csv, open_csv, validated_keys
+
+SPREADSHEET_ID = "1testSheetId"
+
+class SheetHandler(BaseHTTPRequestHandler):
+    """Answers each GET with the next scripted response, or the server's default one"""
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        respond = self.server.responses.pop(0) if self.server.responses else self.server.default
+        status, headers, body = respond(self.path, self.headers)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if 'Content-Length' not in headers:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SheetHandler)
+    httpd.requests = []
+    httpd.responses = []
+    httpd.default = lambda path, headers: (404, {}, b"")
+    httpd.csv_url = lambda gid: (
+        f"http://127.0.0.1:{httpd.server_port}/spreadsheets/d/{SPREADSHEET_ID}/export?format=csv&gid={gid}"
+    )
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    validated_keys.clear()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    validated_keys.clear()
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(csv_fetch_cache.time, 'sleep', delays.append)
+    return delays
+
+def versioned(body, etag):
+    """A sheet that answers 304 to a request revalidating etag"""
+    def respond(path, headers):
+        if headers.get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b""
+        return 200, {'ETag': etag, 'Content-Type': 'text/csv; charset=utf-8'}, body
+    return respond
+
+def test_cached_copy_is_revalidated_with_a_conditional_request(server, tmp_path):
+    server.default = versioned(b"Name,Aspect\nForge,Edge\n", '"v1"')
+    url = server.csv_url(1)
+
+    text, stats = fetch_csv(url, str(tmp_path))
+    assert text == "Name,Aspect\nForge,Edge\n"
+    assert stats['status'] == 'downloaded'
+    _, meta_path = cache_paths(str(tmp_path), f"{SPREADSHEET_ID}_1")
+    with open(meta_path, encoding='utf-8') as f:
+        assert json.load(f)['etag'] == '"v1"'
+
+    validated_keys.clear()
+    text, stats = fetch_csv(url, str(tmp_path))
+    assert stats['status'] == 'not modified'
+    assert text == "Name,Aspect\nForge,Edge\n"
+    assert server.requests[-1][1]['If-None-Match'] == '"v1"'
+
+def test_changed_sheet_replaces_the_cached_copy(server, tmp_path):
+    server.default = versioned(b"Name\nForge\n", '"v1"')
+    fetch_csv(server.csv_url(1), str(tmp_path))
+
+    validated_keys.clear()
+    server.default = versioned(b"Name\nForge\nLantern\n", '"v2"')
+    text, stats = fetch_csv(server.csv_url(1), str(tmp_path))
+    assert stats['status'] == 'downloaded'
+    assert text == "Name\nForge\nLantern\n"
+
+def test_sheet_is_revalidated_once_per_process(server, tmp_path):
+    server.default = versioned(b"Name\nForge\n", '"v1"')
+    fetch_csv(server.csv_url(1), str(tmp_path))
+    text, stats = fetch_csv(server.csv_url(1), str(tmp_path))
+    assert stats == {'status': 'cached', 'attempts': 0, 'bytes': len(b"Name\nForge\n")}
+    assert text == "Name\nForge\n"
+    assert len(server.requests) == 1
+
+def test_retry_after_is_honoured(server, tmp_path, sleeps):
+    server.responses = [lambda path, headers: (503, {'Retry-After': '7'}, b"")]
+    server.default = versioned(b"Name\nForge\n", '"v1"')
+
+    text, stats = fetch_csv(server.csv_url(1), str(tmp_path))
+    assert text == "Name\nForge\n"
+    assert stats['attempts'] == 2
+    assert sleeps == [7.0]
+
+def test_retries_back_off_exponentially(server, tmp_path, sleeps):
+    server.responses = [lambda path, headers: (500, {}, b""), lambda path, headers: (429, {}, b"")]
+    server.default = versioned(b"Name\nForge\n", '"v1"')
+
+    _, stats = fetch_csv(server.csv_url(1), str(tmp_path), backoff=0.5)
+    assert stats['attempts'] == 3
+    assert sleeps == [0.5, 1.0]
+
+def test_giving_up_leaves_no_cache_entry(server, tmp_path, sleeps):
+    server.default = lambda path, headers: (503, {}, b"")
+
+    with pytest.raises(requests.HTTPError):
+        fetch_csv(server.csv_url(1), str(tmp_path), max_retries=2, backoff=0.1)
+    assert len(server.requests) == 3
+    assert sleeps == [0.1, 0.2]
+    assert not os.path.exists(cache_paths(str(tmp_path), f"{SPREADSHEET_ID}_1")[0])
+
+def test_body_is_streamed_to_disk_as_utf8(server, tmp_path):
+    rows = "".join(f"Café {i},Rosé\n" for i in range(20000))
+    server.default = lambda path, headers: (
+        200, {'Content-Type': 'text/csv; charset=iso-8859-1'}, ("Name,Aspect\n" + rows).encode('latin-1')
+    )
+
+    text, stats = fetch_csv(server.csv_url(1), str(tmp_path), return_text=False)
+    assert text is None
+    body_path, _ = cache_paths(str(tmp_path), f"{SPREADSHEET_ID}_1")
+    with open(body_path, encoding='utf-8', newline='') as f:
+        assert f.read() == "Name,Aspect\n" + rows
+    assert stats['bytes'] == os.path.getsize(body_path)
+    assert not os.path.exists(f"{body_path}.tmp")
+
+def test_interrupted_download_keeps_the_previous_copy(server, tmp_path):
+    server.default = versioned(b"Name\nForge\n", '"v1"')
+    fetch_csv(server.csv_url(1), str(tmp_path))
+
+    validated_keys.clear()
+    # The connection closes after part of the promised body
+    server.default = lambda path, headers: (200, {'Content-Length': '1000'}, b"Name\nLan")
+    with pytest.raises(requests.RequestException):
+        fetch_csv(server.csv_url(1), str(tmp_path), max_retries=0)
+    with open(cache_paths(str(tmp_path), f"{SPREADSHEET_ID}_1")[0], encoding='utf-8') as f:
+        assert f.read() == "Name\nForge\n"
+
+def test_offline_mode_serves_only_the_cache(server, tmp_path):
+    server.default = versioned(b"Name\nForge\n", '"v1"')
+    fetch_csv(server.csv_url(1), str(tmp_path))
+    validated_keys.clear()
+
+    text, stats = fetch_csv(server.csv_url(1), str(tmp_path), offline=True)
+    assert (text, stats['status']) == ("Name\nForge\n", 'cached')
+    with pytest.raises(FileNotFoundError):
+        fetch_csv(server.csv_url(2), str(tmp_path), offline=True)
+    assert len(server.requests) == 1
+
+def test_open_csv_reads_rows_from_the_cached_copy(server, tmp_path):
+    server.default = versioned(b'Name,Description\nForge,"Multi\nline"\n', '"v1"')
+
+    with open_csv(server.csv_url(1), str(tmp_path)) as f:
+        assert list(csv.reader(f)) == [["Name", "Description"], ["Forge", "Multi\nline"]]
+
+def test_fetch_all_csv_reports_failures_per_sheet(server, tmp_path):
+    def respond(path, headers):
+        return (200, {}, b"Name\nForge\n") if path.endswith("gid=1") else (404, {}, b"")
+    server.default = respond
+
+    results, timings = fetch_all_csv([server.csv_url(1), server.csv_url(2)], str(tmp_path), max_workers=1)
+    assert results[server.csv_url(1)] == "Name\nForge\n"
+    assert isinstance(results[server.csv_url(2)], requests.HTTPError)
+    assert timings[server.csv_url(1)]['status'] == 'downloaded'
+    assert timings[server.csv_url(2)]['status'] == 'failed'
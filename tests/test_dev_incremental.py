@@ -0,0 +1,100 @@
+import os
+
+GAME = "Book of Hours"
+
+SKILLS_CSV = (
+    "Skills,Description,Aspect\n"
+    "Iron: Cold,Forged in winter,Forge\n"
+    "Sisters' Rose,Grown in the garden,Rose\n"
+    "Moth Wings,Found at dusk,Moth\n"
+)
+
+MEMORIES_CSV = (
+    "Memories,Description,Aspect\n"
+    "Secret Histories,Remembered from Moth Wings,Moth\n"
+    "Forge,Hot,Edge\n"
+)
+
+def sheet_csv_path(dev, sheet_name):
+    sheet_names = list(dev.subfolders_dict[GAME]['sheets'])
+    csv_url = dev.processed_data[GAME]['csv_urls'][sheet_names.index(sheet_name)]
+    return dev.cached_csv_path(csv_url, dev.csv_cache_dir)
+
+def write_sheet(dev, sheet_name, text):
+    path = sheet_csv_path(dev, sheet_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+def build(dev):
+    dev.reset_run_state()
+    dev.main()
+
+def sheet_notes(dev, folder_name):
+    folder = os.path.join(dev.processed_data[GAME]['vault_path'], folder_name)
+    return sorted(os.listdir(folder)) if os.path.isdir(folder) else []
+
+def test_failing_sheet_keeps_its_notes_on_consecutive_runs(dev):
+    write_sheet(dev, "Skills", SKILLS_CSV)
+    write_sheet(dev, "Memories", MEMORIES_CSV)
+    build(dev)
+    skills = sheet_notes(dev, "Skills")
+    assert skills == ["Iron_ Cold.md", "Moth Wings.md", "Sisters' Rose.md"]
+
+    # The same sheet fails on two runs in a row, as with a repeated fetch error
+    os.remove(sheet_csv_path(dev, "Skills"))
+    for _ in range(2):
+        build(dev)
+        assert sheet_notes(dev, "Skills") == skills
+        assert f"{GAME}/Skills" in dev.current_manifest['sheets']
+    assert sheet_notes(dev, "Memories") == ["Forge.md", "Secret Histories.md"]
+
+    write_sheet(dev, "Skills", SKILLS_CSV.replace("Moth Wings,Found at dusk,Moth\n", ""))
+    build(dev)
+    assert sheet_notes(dev, "Skills") == ["Iron_ Cold.md", "Sisters' Rose.md"]
+
+def read_note(dev, rel_path):
+    with open(os.path.join(dev.processed_data[GAME]['vault_path'], *rel_path.split('/')), encoding='utf-8') as f:
+        return f.read()
+
+def test_reverse_links_of_kept_notes_follow_the_linking_notes(dev):
+    write_sheet(dev, "Memories", MEMORIES_CSV)
+    write_sheet(dev, "Skills", SKILLS_CSV)
+    build(dev)
+    assert "- [[Book of Hours/Skills/Iron_ Cold]]\n" in read_note(dev, "Memories/Forge.md")
+
+    # Memories is unchanged and kept; only its notes' reverse links change
+    write_sheet(dev, "Skills", SKILLS_CSV.replace("Forged in winter,Forge", "Forged in winter,Edge"))
+    build(dev)
+    forge = read_note(dev, "Memories/Forge.md")
+    assert "Skills/Iron_ Cold" not in forge
+    assert forge.endswith("## Links\n- [[Book of Hours/Masterlists/Memories]]\n")
+
+    write_sheet(dev, "Skills", SKILLS_CSV)
+    build(dev)
+    assert read_note(dev, "Memories/Forge.md") == forge + "- [[Book of Hours/Skills/Iron_ Cold]]\n"
+
+def test_unchanged_rebuild_leaves_the_manifest_alone(dev):
+    write_sheet(dev, "Memories", MEMORIES_CSV)
+    write_sheet(dev, "Skills", SKILLS_CSV)
+    build(dev)
+    os.utime(dev.manifest_file, ns=(0, 0))
+
+    build(dev)
+    assert os.stat(dev.manifest_file).st_mtime_ns == 0
+    assert not os.path.exists(f"{dev.manifest_file}.tmp")
+
+def test_poll_counts_only_sheets_whose_content_changed(dev, monkeypatch):
+    write_sheet(dev, "Memories", MEMORIES_CSV)
+    write_sheet(dev, "Skills", SKILLS_CSV)
+    build(dev)
+
+    # Every sheet comes back as a fresh 200, but only Skills carries new content
+    def fetch_all_csv(urls, cache_dir, **kwargs):
+        write_sheet(dev, "Memories", MEMORIES_CSV)
+        write_sheet(dev, "Skills", SKILLS_CSV.replace("Found at dusk", "Found at dawn"))
+        return {}, {url: {'status': 'downloaded'} for url in urls}
+
+    monkeypatch.setattr(dev, 'fetch_all_csv', fetch_all_csv)
+    assert f"{GAME}/Memories" not in dev.poll_sheets()
+    assert f"{GAME}/Skills" in dev.poll_sheets()
@@ -0,0 +1,38 @@
+from sheet_diff import changed_columns, diff_rows
+
+HEADERS = ["Skills", "Description", "Aspect"]
+ROWS = [
+    ["Iron: Cold", "Forged in winter", "Forge"],
+    ["Moth Wings", "Found at dusk", ""],
+]
+
+def test_unchanged_rows():
+    diff = diff_rows(HEADERS, ROWS, HEADERS, [list(row) for row in ROWS])
+    assert diff['unchanged'] == [(0, 0), (1, 1)]
+    assert not diff['added'] and not diff['removed'] and not diff['modified']
+    assert not diff['headers_changed']
+
+def test_added_removed_and_modified_rows():
+    new_rows = [
+        ["Iron: Cold", "Forged in spring", "Forge"],
+        ["Sisters' Rose", "Grown in the garden", "Rose"],
+    ]
+    diff = diff_rows(HEADERS, ROWS, HEADERS, new_rows)
+    assert diff['added'] == [1]
+    assert diff['removed'] == [1]
+    assert [(old, new, changed_columns(mask)) for old, new, mask in diff['modified']] == [(0, 0, [1])]
+
+def test_reordered_columns_are_matched_by_header():
+    headers = ["Skills", "Aspect", "Description"]
+    new_rows = [[row[0], row[2], row[1]] for row in ROWS]
+    diff = diff_rows(HEADERS, ROWS, headers, new_rows)
+    assert diff['headers_changed']
+    assert diff['unchanged'] == [(0, 0), (1, 1)]
+
+def test_removed_column_marks_rows_that_held_a_value_modified():
+    headers = ["Skills", "Description"]
+    new_rows = [row[:2] for row in ROWS]
+    diff = diff_rows(HEADERS, ROWS, headers, new_rows)
+    # Iron: Cold loses its Aspect; Moth Wings had none to lose
+    assert [(old, new, changed_columns(mask)) for old, new, mask in diff['modified']] == [(0, 0, [0, 1])]
+    assert diff['unchanged'] == [(1, 1)]
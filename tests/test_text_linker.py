@@ -0,0 +1,82 @@
+import random
+import re
+
+import pytest
+
+from text_linker import build_linker, find_all_names, find_names
+
+# Pieces names and texts are built from: words that nest inside each other,
+# names with non-word-character ends, and separators that do and don't break words
+WORDS = ["Moth", "Mothers", "moth", "Lantern", "Sisters'", "Wolf's Tooth", "Key|Door", "(Aspect)", "Iron: Cold", "A#b", "x_1", "Café", "Edge"]
+SEPARATORS = [" ", "", "'", ".", ", ", "-", "_", "(", ")", "|", "\n", "s", "2"]
+
+def random_names(rng):
+    names = set()
+    for _ in range(rng.randint(1, 6)):
+        name = "".join(rng.choice(WORDS + SEPARATORS) for _ in range(rng.randint(1, 3)))
+        if name.strip():
+            names.add(name)
+    return names
+
+def random_text(rng):
+    return "".join(rng.choice(WORDS + SEPARATORS) for _ in range(rng.randint(0, 25)))
+
+def regex_names(text, names, ignore_case):
+    """Names found by the per-name \\b-delimited regex the strict linker replaced"""
+    flags = re.IGNORECASE if ignore_case else 0
+    return {name for name in names if re.search(r'\b' + re.escape(name) + r'\b', text, flags)}
+
+def boundary_names(text, names, ignore_case):
+    """Names found by the default rule: no word character next to a word-character end"""
+    flags = re.IGNORECASE if ignore_case else 0
+    found = set()
+    for name in names:
+        before = r'(?<!\w)' if re.match(r'\w', name[0]) else ''
+        after = r'(?!\w)' if re.match(r'\w', name[-1]) else ''
+        if re.search(before + re.escape(name) + after, text, flags):
+            found.add(name)
+    return found
+
+@pytest.mark.parametrize("ignore_case", [False, True])
+def test_strict_linker_matches_the_word_boundary_regex(ignore_case):
+    rng = random.Random(21)
+    for _ in range(3000):
+        names, text = random_names(rng), random_text(rng)
+        linker = build_linker(names, ignore_case=ignore_case, strict=True)
+        assert find_all_names(text, linker) == regex_names(text, names, ignore_case), (names, text)
+
+@pytest.mark.parametrize("ignore_case", [False, True])
+def test_linker_requires_boundaries_only_at_word_character_ends(ignore_case):
+    rng = random.Random(2024)
+    for _ in range(3000):
+        names, text = random_names(rng), random_text(rng)
+        linker = build_linker(names, ignore_case=ignore_case)
+        assert find_all_names(text, linker) == boundary_names(text, names, ignore_case), (names, text)
+
+def test_name_is_not_found_inside_a_longer_word():
+    linker = build_linker(["Moth"])
+    assert find_all_names("Mothers of the Moth.", linker) == {"Moth"}
+    assert find_all_names("Mothers and moths", linker) == set()
+
+@pytest.mark.parametrize("name, text", [
+    ("Sisters'", "the Sisters' gate"),
+    ("Sisters'", "ask the Sisters'."),
+    ("(Aspect)", "Lantern(Aspect)"),
+    ("#b", "tag ##b"),
+])
+def test_non_word_character_ends_need_no_boundary(name, text):
+    assert find_all_names(text, build_linker([name])) == {name}
+    # The \b rule needs a word character on one side of each end, so strict linking misses these
+    assert find_all_names(text, build_linker([name], strict=True)) == set()
+
+def test_strict_linker_keeps_word_boundaries_at_non_word_ends():
+    linker = build_linker(["Sisters'"], strict=True)
+    assert find_all_names("Sisters'Rose", linker) == {"Sisters'"}
+
+def test_ignore_case_reports_names_as_given():
+    linker = build_linker(["Wolf's Tooth"], ignore_case=True)
+    assert find_all_names("a WOLF'S TOOTH here", linker) == {"Wolf's Tooth"}
+
+def test_find_names_prefers_the_longest_match_without_overlaps():
+    linker = build_linker(["Moth", "Moth Hour", "Hour", "Edge"])
+    assert find_names("Moth Hour, then Moth and Edge at the Hour", linker) == ["Moth Hour", "Moth", "Edge", "Hour"]
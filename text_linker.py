@@ -0,0 +1,123 @@
+from collections import deque
+
+# Finds known names (note titles, keywords, aliases) inside prose such as
+# transcripts, descriptions and history entries. All names are compiled into
+# one Aho-Corasick automaton, so each text is scanned once in linear time
+# however many names there are, instead of testing every name against it.
+# A name whose first or last character is a word character must meet a word
+# boundary on that side, so "Moth" is not found inside "Mothers", while
+# "Sisters'" and "Lantern (Aspect)" still match before a space or punctuation.
+# Strict linkers use the regex \b rule on both sides instead, for callers that
+# must match exactly what a \b-delimited regex would.
+
+def build_linker(names, ignore_case=False, strict=False):
+    """
+    Compile names into a single automaton.
+
+    Args:
+        names (iterable): Names to look for; empty names are ignored
+        ignore_case (bool): Match regardless of case
+        strict (bool): Require a regex \b boundary at both ends of every match
+
+    Returns:
+        dict: The automaton, for find_names and find_all_names
+    """
+    goto = [{}]
+    fail = [0]
+    # Per state: (length, name) of every name ending there, longest first
+    matched = [()]
+
+    for name in set(names):
+        if not name:
+            continue
+        state = 0
+        for char in fold_case(name) if ignore_case else name:
+            next_state = goto[state].get(char)
+            if next_state is None:
+                next_state = len(goto)
+                goto.append({})
+                fail.append(0)
+                matched.append(())
+                goto[state][char] = next_state
+            state = next_state
+        matched[state] += ((len(name), name),)
+
+    # Failure links, breadth first, so shallower states are linked before deeper ones
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, next_state in goto[state].items():
+            queue.append(next_state)
+            fallback = fail[state]
+            while fallback and char not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[next_state] = goto[fallback].get(char, 0)
+            matched[next_state] = tuple(sorted(matched[next_state] + matched[fail[next_state]], reverse=True))
+
+    return {'goto': goto, 'fail': fail, 'matched': matched, 'ignore_case': ignore_case, 'strict': strict}
+
+def fold_case(text):
+    """Lowercase text without changing its length, so match offsets stay valid"""
+    folded = text.lower()
+    if len(folded) != len(text):
+        folded = ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+    return folded
+
+def is_word_char(char):
+    return char.isalnum() or char == '_'
+
+def is_word_boundary(text, index):
+    before = index > 0 and is_word_char(text[index - 1])
+    after = index < len(text) and is_word_char(text[index])
+    return before != after
+
+def is_whole_name(text, start, end, name):
+    """Whether name at text[start:end] is not glued to a word on a side where it starts or ends with a word character"""
+    if is_word_char(name[0]) and start > 0 and is_word_char(text[start - 1]):
+        return False
+    if is_word_char(name[-1]) and end < len(text) and is_word_char(text[end]):
+        return False
+    return True
+
+def scan_text(text, linker):
+    """Yield (start, end, name) for every occurrence of a name on word boundaries"""
+    goto = linker['goto']
+    fail = linker['fail']
+    matched = linker['matched']
+    strict = linker['strict']
+    state = 0
+    for index, char in enumerate(fold_case(text) if linker['ignore_case'] else text):
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        if matched[state]:
+            end = index + 1
+            for length, name in matched[state]:
+                start = end - length
+                if strict:
+                    if is_word_boundary(text, start) and is_word_boundary(text, end):
+                        yield start, end, name
+                elif is_whole_name(text, start, end, name):
+                    yield start, end, name
+
+def find_all_names(text, linker):
+    """Every name occurring anywhere in text, overlapping matches included"""
+    return {name for _, _, name in scan_text(text, linker)}
+
+def find_names(text, linker):
+    """
+    Names linked from text, scanning left to right with the longest match winning.
+
+    A name nested inside a longer match ("Moth" in "Moth Hour") is not linked,
+    and matches do not overlap.
+
+    Returns:
+        list: Names in the order they appear, repeats included
+    """
+    names = []
+    taken_until = 0
+    for start, end, name in sorted(scan_text(text, linker), key=lambda match: (match[0], -match[1])):
+        if start >= taken_until:
+            names.append(name)
+            taken_until = end
+    return names
@@ -0,0 +1,208 @@
+import logging
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Writes generated notes into the vault as one batch. Changed files are first
+# written in full to a staging folder inside the vault, then moved into place
+# with os.replace, so a crash while rendering or staging leaves the vault as it
+# was and no note is ever left half-written. Files whose content is already on
+# disk are not rewritten at all, which keeps sync clients from re-uploading them.
+
+logger = logging.getLogger(__name__)
+
+# Staging folder, created inside the vault so os.replace never crosses
+# filesystems; Obsidian ignores dot-folders
+STAGING_FOLDER = ".vault_staging"
+
+# Stale folders are renamed into this folder in one step, then deleted in the
+# background; a run that is killed first has its leftovers deleted next time
+TRASH_FOLDER = ".vault_trash"
+
+# Folders never pruned
+PROTECTED_FOLDERS = {".obsidian", STAGING_FOLDER, TRASH_FOLDER}
+
+# Threads deleting files and trashed folders. Per-file deletes on a network or
+# Drive-mounted vault are latency-bound, so they are issued concurrently.
+DELETE_WORKERS = 8
+delete_pool = None
+
+# Trash folders used this run, removed once their contents are deleted
+trash_paths = set()
+
+def vault_file_path(vault_path, rel_path):
+    return os.path.join(vault_path, *rel_path.split('/'))
+
+def unchanged_on_disk(filepath, content, data):
+    """Whether filepath already holds content, checking the size before reading it back"""
+    # Text-mode writes turn each newline into os.linesep
+    expected_size = len(data) + content.count('\n') * (len(os.linesep) - 1)
+    try:
+        if os.path.getsize(filepath) != expected_size:
+            return False
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return f.read() == content
+    except (OSError, UnicodeDecodeError):
+        return False
+
+def commit_vault_files(vault_path, files):
+    """
+    Write a batch of files into the vault, skipping those whose content is unchanged.
+
+    Every changed file is staged completely before any file in the vault is
+    touched; the staged files are then swapped in with os.replace.
+
+    Args:
+        vault_path (str): Vault root
+        files (dict): Vault-relative path ('/'-separated) -> file content
+
+    Returns:
+        dict: Vault-relative path -> bytes written, for the files that changed
+    """
+    staging_path = os.path.join(vault_path, STAGING_FOLDER)
+    # A run that crashed mid-commit may have left staged files behind
+    shutil.rmtree(staging_path, ignore_errors=True)
+
+    staged = []
+    written = {}
+    for rel_path, content in files.items():
+        data = content.encode('utf-8')
+        filepath = vault_file_path(vault_path, rel_path)
+        if unchanged_on_disk(filepath, content, data):
+            continue
+        if not staged:
+            os.makedirs(staging_path, exist_ok=True)
+        staged_file = os.path.join(staging_path, f"{len(staged)}.tmp")
+        with open(staged_file, 'w', encoding='utf-8') as f:
+            f.write(content)
+        staged.append((staged_file, filepath))
+        written[rel_path] = len(data)
+
+    for staged_file, filepath in staged:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        os.replace(staged_file, filepath)
+
+    shutil.rmtree(staging_path, ignore_errors=True)
+    logger.debug("Committed %d of %d files to %s", len(written), len(files), vault_path)
+    return written
+
+def get_delete_pool():
+    global delete_pool
+    if delete_pool is None:
+        delete_pool = ThreadPoolExecutor(max_workers=DELETE_WORKERS, thread_name_prefix='vault-delete')
+    return delete_pool
+
+def delete_file(filepath):
+    try:
+        os.remove(filepath)
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        logger.warning(f"Error deleting {filepath}: {e}")
+        return False
+
+def delete_files(filepaths):
+    """
+    Delete files concurrently and wait for them.
+
+    Returns:
+        list: Paths of the files that were deleted
+    """
+    filepaths = list(filepaths)
+    if len(filepaths) < 2:
+        return [filepath for filepath in filepaths if delete_file(filepath)]
+    deleted = get_delete_pool().map(delete_file, filepaths)
+    return [filepath for filepath, was_deleted in zip(filepaths, deleted) if was_deleted]
+
+def trash_folder(folder, vault_path):
+    """Move a folder out of the vault tree in one rename and delete it in the background"""
+    trash_path = os.path.join(vault_path, TRASH_FOLDER)
+    target = os.path.join(trash_path, uuid.uuid4().hex)
+    try:
+        os.makedirs(trash_path, exist_ok=True)
+        trash_paths.add(trash_path)
+        os.replace(folder, target)
+    except OSError as e:
+        # Renames can fail on some synced drives; delete in place instead
+        logger.debug("Could not move %s aside (%s), deleting in place", folder, e)
+        target = folder
+    get_delete_pool().submit(shutil.rmtree, target, ignore_errors=True)
+
+def empty_trash(vault_path):
+    """Delete, in the background, folders a previous run trashed but did not finish deleting"""
+    trash_path = os.path.join(vault_path, TRASH_FOLDER)
+    if os.path.isdir(trash_path):
+        trash_paths.add(trash_path)
+        for item in os.listdir(trash_path):
+            get_delete_pool().submit(shutil.rmtree, os.path.join(trash_path, item), ignore_errors=True)
+
+def wait_for_deletes():
+    """Block until every background delete has finished"""
+    global delete_pool
+    if delete_pool is not None:
+        delete_pool.shutdown(wait=True)
+        delete_pool = None
+    for trash_path in list(trash_paths):
+        try:
+            os.rmdir(trash_path)
+        except OSError:
+            pass  # Something in it could not be deleted; retried next run
+        trash_paths.discard(trash_path)
+
+def prune_vault(root, vault_path, keep):
+    """
+    Delete everything under root that this build did not produce.
+
+    Runs after the new files are committed, in place of wiping the vault before
+    the build, so the vault is never left empty by a failed run. Folders that
+    hold no kept file are renamed aside whole and deleted in the background
+    instead of being walked; stale files next to kept ones are deleted
+    concurrently.
+
+    Args:
+        root (str): Folder to prune, the vault itself or one of its subfolders
+        vault_path (str): Vault root, which keep is relative to
+        keep (set): Vault-relative paths ('/'-separated) of the files to keep
+
+    Returns:
+        list: Paths of the deleted files and trashed folders
+    """
+    kept_folders = {'.'}
+    for rel_path in keep:
+        parts = rel_path.split('/')[:-1]
+        for depth in range(1, len(parts) + 1):
+            kept_folders.add('/'.join(parts[:depth]))
+
+    empty_trash(vault_path)
+    trashed = []
+    stale_files = []
+    visited = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, vault_path).replace('\\', '/')
+        visited.append(dirpath)
+        for dirname in list(dirnames):
+            rel_subdir = dirname if rel_dir == '.' else f"{rel_dir}/{dirname}"
+            if dirname in PROTECTED_FOLDERS:
+                dirnames.remove(dirname)
+            elif rel_subdir not in kept_folders:
+                dirnames.remove(dirname)
+                subdir = os.path.join(dirpath, dirname)
+                trash_folder(subdir, vault_path)
+                trashed.append(subdir)
+        for filename in filenames:
+            rel_path = filename if rel_dir == '.' else f"{rel_dir}/{filename}"
+            if rel_path not in keep:
+                stale_files.append(os.path.join(dirpath, filename))
+
+    removed = delete_files(stale_files) + trashed
+
+    # Kept folders whose kept files never reached the disk may now be empty
+    for dirpath in reversed(visited[1:]):
+        try:
+            os.rmdir(dirpath)
+        except OSError:
+            pass  # Still holds kept files
+    logger.debug("Pruned %d files and %d folders from %s", len(removed) - len(trashed), len(trashed), root)
+    return removed